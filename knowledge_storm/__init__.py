@@ -1,10 +1,225 @@
-from .storm_wiki import *
-from .collaborative_storm import *
-from .encoder import *
-from .interface import *
-from .lm import *
-from .rm import *
-from .utils import *
-from .dataclass import *
+from .lazy_imports import lazy_exports
 
 __version__ = "1.1.0"
+
+# Public names are imported from their submodule on first access, so that `import knowledge_storm`
+# does not load every language model client, retriever and embedding stack up front.
+_EXPORTS = {
+    ".storm_wiki.engine": [
+        "STORMWikiLMConfigs",
+        "STORMWikiRunnerArguments",
+        "STORMWikiRunner",
+    ],
+    ".storm_wiki.modules.knowledge_curation": [
+        "ConvSimulator",
+        "WikiWriter",
+        "AskQuestion",
+        "AskQuestionWithPersona",
+        "TopicExpert",
+        "StormKnowledgeCurationModule",
+    ],
+    ".storm_wiki.modules.persona_generator": [
+        "get_wiki_page_title_and_toc",
+        "FindRelatedTopic",
+        "GenPersona",
+        "CreateWriterWithPersona",
+        "StormPersonaGenerator",
+    ],
+    ".storm_wiki.modules.retriever": [
+        "GENERALLY_UNRELIABLE",
+        "DEPRECATED",
+        "BLACKLISTED",
+        "is_valid_wikipedia_source",
+    ],
+    ".storm_wiki.modules.storm_dataclass": [
+        "DialogueTurn",
+        "StormInformationTable",
+        "StormArticle",
+    ],
+    ".storm_wiki.modules.outline_generation": [
+        "StormOutlineGenerationModule",
+        "WritePageOutline",
+    ],
+    ".storm_wiki.modules.article_generation": ["StormArticleGenerationModule"],
+    ".storm_wiki.modules.article_polish": ["StormArticlePolishingModule"],
+    ".collaborative_storm.modules.article_generation": ["WriteSection"],
+    ".collaborative_storm.modules.grounded_question_answering": [
+        "QuestionToQuery",
+        "AnswerQuestion",
+        "AnswerQuestionModule",
+    ],
+    ".collaborative_storm.modules.grounded_question_generation": [
+        "ConvertUtteranceStyle",
+        "GroundedQuestionGeneration",
+        "GroundedQuestionGenerationModule",
+    ],
+    ".collaborative_storm.modules.information_insertion_module": [
+        "InsertInformation",
+        "InsertInformationCandidateChoice",
+        "InsertInformationModule",
+        "ExpandSection",
+        "ExpandNodeModule",
+    ],
+    ".collaborative_storm.modules.simulate_user": ["GenSimulatedUserUtterance"],
+    ".collaborative_storm.modules.warmstart_hierarchical_chat": [
+        "WarmStartModerator",
+        "SectionToConvTranscript",
+        "ReportToConversation",
+        "WarmStartConversation",
+        "GenerateWarmStartOutline",
+        "GenerateWarmStartOutlineModule",
+        "WarmStartModule",
+    ],
+    ".collaborative_storm.modules.knowledge_base_summary": [
+        "KnowledgeBaseSummmary",
+        "KnowledgeBaseSummaryModule",
+    ],
+    ".collaborative_storm.modules.costorm_expert_utterance_generator": [
+        "GenExpertActionPlanning",
+        "CoStormExpertUtteranceGenerationModule",
+    ],
+    ".collaborative_storm.modules.co_storm_agents": [
+        "CoStormExpert",
+        "SimulatedUser",
+        "Moderator",
+        "PureRAGAgent",
+    ],
+    ".collaborative_storm.modules.expert_generation": ["GenerateExpertModule"],
+    ".collaborative_storm.modules.callback": ["BaseCallbackHandler"],
+    ".collaborative_storm.modules.collaborative_storm_utils": [
+        "format_search_results",
+        "extract_cited_storm_info",
+        "trim_output_after_hint",
+        "separate_citations",
+        "extract_and_remove_citations",
+        "keep_first_and_last_paragraph",
+        "clean_up_section",
+    ],
+    ".collaborative_storm.engine": [
+        "CollaborativeStormLMConfigs",
+        "RunnerArgument",
+        "TurnPolicySpec",
+        "DiscourseManager",
+        "CoStormRunner",
+    ],
+    ".logging_wrapper": ["LoggingWrapper"],
+    ".cache": [
+        "DEFAULT_CACHE_PATH",
+        "DEFAULT_CACHE_MAX_BYTES",
+        "DEFAULT_SEARCH_CACHE_PATH",
+        "DEFAULT_SEARCH_CACHE_MAX_BYTES",
+        "DEFAULT_SEARCH_CACHE_TTL",
+        "DEFAULT_PAGE_CACHE_PATH",
+        "DEFAULT_PAGE_CACHE_MAX_BYTES",
+        "DEFAULT_PAGE_CACHE_MAX_AGE",
+        "SQLiteCache",
+        "configure_response_cache",
+        "get_response_cache",
+        "configure_search_cache",
+        "get_search_cache",
+        "configure_page_cache",
+        "get_page_cache",
+    ],
+    ".encoder": [
+        "DEFAULT_SENTENCE_TRANSFORMER",
+        "get_sentence_transformer",
+        "preload_sentence_transformers",
+        "normalize_embeddings",
+        "EmbeddingCache",
+        "Encoder",
+    ],
+    ".http_session": [
+        "DEFAULT_HTTP_POOL_SIZE",
+        "configure_http_pool",
+        "get_http_session",
+        "create_httpx_client",
+        "create_async_httpx_client",
+    ],
+    ".interface": [
+        "InformationTable",
+        "Information",
+        "ArticleSectionNode",
+        "Article",
+        "Retriever",
+        "KnowledgeCurationModule",
+        "OutlineGenerationModule",
+        "ArticleGenerationModule",
+        "ArticlePolishingModule",
+        "log_execution_time",
+        "LMHistory",
+        "LMConfigs",
+        "Engine",
+        "Agent",
+    ],
+    ".lm": [
+        "LM_LRU_CACHE_MAX_SIZE",
+        "TokenBucketRateLimiter",
+        "configure_rate_limit",
+        "get_rate_limiter",
+        "get_rate_limit_stats",
+        "acquire_rate_limit",
+        "aacquire_rate_limit",
+        "split_static_prompt_prefix",
+        "LM",
+        "SingleFlight",
+        "get_coalescing_stats",
+        "cached_litellm_completion",
+        "litellm_completion",
+        "litellm_stream_completion",
+        "acached_litellm_completion",
+        "alitellm_completion",
+        "cached_litellm_text_completion",
+        "litellm_text_completion",
+        "acached_litellm_text_completion",
+        "alitellm_text_completion",
+        "LitellmModel",
+        "OpenAIModel",
+        "DeepSeekModel",
+        "AzureOpenAIModel",
+        "GroqModel",
+        "ClaudeModel",
+        "VLLMClient",
+        "OllamaClient",
+        "TGIClient",
+        "TogetherClient",
+        "GoogleModel",
+    ],
+    ".rm": [
+        "DEFAULT_MAX_CONCURRENT_QUERIES",
+        "search_concurrently",
+        "MicroBatcher",
+        "YouRM",
+        "BingSearch",
+        "VectorRM",
+        "StanfordOvalArxivRM",
+        "SerperRM",
+        "BraveRM",
+        "SearXNG",
+        "DuckDuckGoSearchRM",
+        "TavilySearchRM",
+        "GoogleSearch",
+        "AzureAISearch",
+    ],
+    ".webpage_extraction": [
+        "DEFAULT_EXTRACTION_PROCESSES",
+        "SNIPPET_SEPARATORS",
+        "get_text_splitter",
+        "extract_article",
+        "get_extraction_pool",
+        "discard_extraction_pool",
+    ],
+    ".utils": [
+        "truncate_filename",
+        "load_api_key",
+        "makeStringRed",
+        "stream_predict",
+        "QdrantVectorStoreManager",
+        "ArticleTextProcessing",
+        "FileIOHelper",
+        "WebPageHelper",
+        "user_input_appropriateness_check",
+        "purpose_appropriateness_check",
+    ],
+    ".dataclass": ["ConversationTurn", "KnowledgeNode", "KnowledgeBase"],
+}
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
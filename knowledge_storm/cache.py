@@ -0,0 +1,407 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+DEFAULT_CACHE_PATH = os.path.join(Path.home(), ".storm_local_cache", "cache.sqlite3")
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Search results go stale much faster than LM responses, so they live in their own file with a TTL.
+DEFAULT_SEARCH_CACHE_PATH = os.path.join(
+    Path.home(), ".storm_local_cache", "search_cache.sqlite3"
+)
+DEFAULT_SEARCH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_SEARCH_CACHE_TTL = 24 * 60 * 60
+# Fetched pages are revalidated with the origin once they are older than their max age (see
+# `WebPageHelper`), so entries are only dropped by size-based eviction.
+DEFAULT_PAGE_CACHE_PATH = os.path.join(
+    Path.home(), ".storm_local_cache", "page_cache.sqlite3"
+)
+DEFAULT_PAGE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_PAGE_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Recency is only refreshed when it is older than this, so that cache hits from many processes
+# do not all turn into writes. LRU eviction does not need a finer resolution.
+_ACCESS_TIME_RESOLUTION = 60.0
+_EVICTION_LOW_WATER_MARK = 0.9
+# SQLite's default limit on the number of host parameters in one statement is 999.
+_MAX_KEYS_PER_QUERY = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size (id, total) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache BEGIN
+    UPDATE cache_size SET total = total + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_size_update AFTER UPDATE OF size ON cache BEGIN
+    UPDATE cache_size SET total = total + NEW.size - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache BEGIN
+    UPDATE cache_size SET total = total - OLD.size WHERE id = 0;
+END;
+"""
+
+
+class SQLiteCache:
+    """
+    A single-file key-value cache that can be shared by many threads and processes.
+
+    Values are pickled into one SQLite database in WAL mode, so concurrent readers never block and
+    writers from different processes are serialized by SQLite's own locking. Entries expire `ttl`
+    seconds after they were written, and the least recently used entries are evicted once the
+    stored values exceed `max_bytes`. Keys live in namespaces (e.g. "lm", "embedding") so that
+    several caches can share one file.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Args:
+            path (str): Path of the SQLite database file. Created if it does not exist.
+            max_bytes (int): Upper bound on the total size of the stored (pickled) values.
+            ttl (Optional[float]): Time to live of an entry in seconds. None keeps entries until
+                they are evicted.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads or carried over a fork.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _count(self, namespace: str, hits: int, misses: int):
+        with self._stats_lock:
+            self._hits[namespace] = self._hits.get(namespace, 0) + hits
+            self._misses[namespace] = self._misses.get(namespace, 0) + misses
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        return self.get_many(namespace, [key])[0]
+
+    def get_many(self, namespace: str, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Looks up several keys with one query per chunk of keys.
+
+        Returns:
+            List[Optional[Any]]: The cached values in the order of `keys`, None for misses.
+        """
+        digests = [self._digest(key) for key in keys]
+        found = {}
+        try:
+            connection = self._connection()
+            now = time.time()
+            stale = []
+            for start in range(0, len(digests), _MAX_KEYS_PER_QUERY):
+                chunk = digests[start : start + _MAX_KEYS_PER_QUERY]
+                rows = connection.execute(
+                    f"SELECT key, value, created_at, accessed_at FROM cache "
+                    f"WHERE namespace = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    (namespace, *chunk),
+                ).fetchall()
+                for digest, value, created_at, accessed_at in rows:
+                    if self.ttl is not None and created_at < now - self.ttl:
+                        continue
+                    found[digest] = value
+                    if accessed_at < now - _ACCESS_TIME_RESOLUTION:
+                        stale.append(digest)
+            for start in range(0, len(stale), _MAX_KEYS_PER_QUERY):
+                chunk = stale[start : start + _MAX_KEYS_PER_QUERY]
+                connection.execute(
+                    f"UPDATE cache SET accessed_at = ? "
+                    f"WHERE namespace = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    (now, namespace, *chunk),
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Cache lookup in {self.path} failed: {e}")
+
+        values = []
+        for digest in digests:
+            value = found.get(digest)
+            if value is not None:
+                try:
+                    value = pickle.loads(value)
+                except Exception as e:
+                    logging.warning(f"Dropping unreadable cache entry: {e}")
+                    value = None
+            values.append(value)
+        num_hits = sum(value is not None for value in values)
+        self._count(namespace, num_hits, len(values) - num_hits)
+        return values
+
+    def put(self, namespace: str, key: str, value: Any):
+        self.put_many(namespace, [(key, value)])
+
+    def put_many(self, namespace: str, items: Iterable[Tuple[str, Any]]):
+        """Stores several values in one transaction, then applies expiry and size-bounded eviction."""
+        now = time.time()
+        rows = []
+        for key, value in items:
+            try:
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logging.warning(f"Skipping a value that cannot be cached: {e}")
+                continue
+            if len(blob) > self.max_bytes:
+                continue
+            rows.append((namespace, self._digest(key), blob, len(blob), now, now))
+        if not rows:
+            return
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT INTO cache (namespace, key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE SET "
+                    "value = excluded.value, size = excluded.size, "
+                    "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                    rows,
+                )
+                self._evict(connection, now)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logging.warning(f"Cache write to {self.path} failed: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        if self.ttl is not None:
+            connection.execute(
+                "DELETE FROM cache WHERE created_at < ?", (now - self.ttl,)
+            )
+        total_bytes = self._total_bytes(connection)
+        if total_bytes <= self.max_bytes:
+            return
+        # Evict down to a low-water mark so that a full cache is not trimmed on every write.
+        excess = total_bytes - int(self.max_bytes * _EVICTION_LOW_WATER_MARK)
+        victims, freed = [], 0
+        for rowid, size in connection.execute(
+            "SELECT rowid, size FROM cache ORDER BY accessed_at"
+        ):
+            victims.append(rowid)
+            freed += size
+            if freed >= excess:
+                break
+        for start in range(0, len(victims), _MAX_KEYS_PER_QUERY):
+            chunk = victims[start : start + _MAX_KEYS_PER_QUERY]
+            connection.execute(
+                f"DELETE FROM cache WHERE rowid IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+
+    @staticmethod
+    def _total_bytes(connection: sqlite3.Connection) -> int:
+        return connection.execute(
+            "SELECT total FROM cache_size WHERE id = 0"
+        ).fetchone()[0]
+
+    def clear(self, namespace: Optional[str] = None):
+        connection = self._connection()
+        if namespace is None:
+            connection.execute("DELETE FROM cache")
+        else:
+            connection.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def get_stats(
+        self, namespace: Optional[str] = None, reset: bool = False
+    ) -> Dict[str, Union[int, float]]:
+        """
+        Retrieves the hit/miss counters of this process and the current size of the cache file.
+
+        Args:
+            namespace (Optional[str]): Restrict the counters and entry count to one namespace.
+            reset (bool): If True, resets the hit/miss counters after retrieval.
+
+        Returns:
+            Dict[str, Union[int, float]]: hits, misses, hit_rate, entries and bytes (the latter for
+                the whole file).
+        """
+        with self._stats_lock:
+            namespaces = set(self._hits) | set(self._misses)
+            if namespace is not None:
+                namespaces &= {namespace}
+            hits = sum(self._hits.get(name, 0) for name in namespaces)
+            misses = sum(self._misses.get(name, 0) for name in namespaces)
+            if reset:
+                for name in namespaces:
+                    self._hits.pop(name, None)
+                    self._misses.pop(name, None)
+        connection = self._connection()
+        if namespace is None:
+            entries = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        else:
+            entries = connection.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (namespace,)
+            ).fetchone()[0]
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": self._total_bytes(connection),
+        }
+
+
+class _ConfigurableCache:
+    """A process-wide `SQLiteCache` that is opened with its defaults on first use unless configured."""
+
+    def __init__(self, name: str, **defaults):
+        self.name = name
+        self.defaults = defaults
+        self._cache: Optional[SQLiteCache] = None
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def configure(self, path, max_bytes, ttl) -> Optional[SQLiteCache]:
+        cache = (
+            SQLiteCache(path=path, max_bytes=max_bytes, ttl=ttl)
+            if path is not None
+            else None
+        )
+        with self._lock:
+            self._cache = cache
+            self._configured = True
+        return cache
+
+    def get(self) -> Optional[SQLiteCache]:
+        if self._configured:
+            return self._cache
+        with self._lock:
+            if not self._configured:
+                try:
+                    self._cache = SQLiteCache(**self.defaults)
+                except (OSError, sqlite3.Error) as e:
+                    logging.warning(f"{self.name} disabled: {e}")
+                    self._cache = None
+                self._configured = True
+            return self._cache
+
+
+_response_cache = _ConfigurableCache("Persistent cache")
+_search_cache = _ConfigurableCache(
+    "Search cache",
+    path=DEFAULT_SEARCH_CACHE_PATH,
+    max_bytes=DEFAULT_SEARCH_CACHE_MAX_BYTES,
+    ttl=DEFAULT_SEARCH_CACHE_TTL,
+)
+_page_cache = _ConfigurableCache(
+    "Page cache", path=DEFAULT_PAGE_CACHE_PATH, max_bytes=DEFAULT_PAGE_CACHE_MAX_BYTES
+)
+
+
+def configure_response_cache(
+    path: Optional[str] = DEFAULT_CACHE_PATH,
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ttl: Optional[float] = None,
+) -> Optional[SQLiteCache]:
+    """
+    Sets the persistent cache shared by the LM wrappers and `Encoder` in this process.
+
+    Processes that configure the same path share their cached responses and embeddings. Nothing is
+    created on disk until the cache is configured or first used.
+
+    Args:
+        path (Optional[str]): Path of the SQLite database file. Pass None to disable the cache.
+        max_bytes (int): Upper bound on the total size of the stored values.
+        ttl (Optional[float]): Time to live of an entry in seconds. None keeps entries until evicted.
+
+    Returns:
+        Optional[SQLiteCache]: The configured cache, or None if caching was disabled.
+    """
+    return _response_cache.configure(path=path, max_bytes=max_bytes, ttl=ttl)
+
+
+def get_response_cache() -> Optional[SQLiteCache]:
+    """Returns the configured persistent cache, opening the default one on first use."""
+    return _response_cache.get()
+
+
+def configure_search_cache(
+    path: Optional[str] = DEFAULT_SEARCH_CACHE_PATH,
+    max_bytes: int = DEFAULT_SEARCH_CACHE_MAX_BYTES,
+    ttl: Optional[float] = DEFAULT_SEARCH_CACHE_TTL,
+) -> Optional[SQLiteCache]:
+    """
+    Sets the cache of search results shared by every `Retriever` in this process.
+
+    Args:
+        path (Optional[str]): Path of the SQLite database file. Pass None to disable the cache.
+        max_bytes (int): Upper bound on the total size of the stored results.
+        ttl (Optional[float]): Time to live of a result in seconds. None keeps results until evicted.
+
+    Returns:
+        Optional[SQLiteCache]: The configured cache, or None if caching was disabled.
+    """
+    return _search_cache.configure(path=path, max_bytes=max_bytes, ttl=ttl)
+
+
+def get_search_cache() -> Optional[SQLiteCache]:
+    """Returns the configured search cache, opening the default one on first use."""
+    return _search_cache.get()
+
+
+def configure_page_cache(
+    path: Optional[str] = DEFAULT_PAGE_CACHE_PATH,
+    max_bytes: int = DEFAULT_PAGE_CACHE_MAX_BYTES,
+    ttl: Optional[float] = None,
+) -> Optional[SQLiteCache]:
+    """
+    Sets the cache of fetched web pages shared by every `WebPageHelper` in this process.
+
+    Args:
+        path (Optional[str]): Path of the SQLite database file. Pass None to disable the cache.
+        max_bytes (int): Upper bound on the total size of the stored pages and extracted texts.
+        ttl (Optional[float]): Hard time to live of an entry in seconds. None keeps entries until
+            evicted; stale pages are revalidated rather than dropped.
+
+    Returns:
+        Optional[SQLiteCache]: The configured cache, or None if caching was disabled.
+    """
+    return _page_cache.configure(path=path, max_bytes=max_bytes, ttl=ttl)
+
+
+def get_page_cache() -> Optional[SQLiteCache]:
+    """Returns the configured page cache, opening the default one on first use."""
+    return _page_cache.get()
@@ -1,2 +1,67 @@
-from .modules import *
-from .engine import *
+from ..lazy_imports import lazy_exports
+
+_EXPORTS = {
+    ".modules.article_generation": ["ArticleGenerationModule", "WriteSection"],
+    ".modules.grounded_question_answering": [
+        "QuestionToQuery",
+        "AnswerQuestion",
+        "AnswerQuestionModule",
+    ],
+    ".modules.grounded_question_generation": [
+        "ConvertUtteranceStyle",
+        "GroundedQuestionGeneration",
+        "GroundedQuestionGenerationModule",
+    ],
+    ".modules.information_insertion_module": [
+        "InsertInformation",
+        "InsertInformationCandidateChoice",
+        "InsertInformationModule",
+        "ExpandSection",
+        "ExpandNodeModule",
+    ],
+    ".modules.simulate_user": ["GenSimulatedUserUtterance"],
+    ".modules.warmstart_hierarchical_chat": [
+        "WarmStartModerator",
+        "SectionToConvTranscript",
+        "ReportToConversation",
+        "WarmStartConversation",
+        "GenerateWarmStartOutline",
+        "GenerateWarmStartOutlineModule",
+        "WarmStartModule",
+    ],
+    ".modules.knowledge_base_summary": [
+        "KnowledgeBaseSummmary",
+        "KnowledgeBaseSummaryModule",
+    ],
+    ".modules.costorm_expert_utterance_generator": [
+        "GenExpertActionPlanning",
+        "CoStormExpertUtteranceGenerationModule",
+    ],
+    ".modules.co_storm_agents": [
+        "CoStormExpert",
+        "SimulatedUser",
+        "Moderator",
+        "PureRAGAgent",
+    ],
+    ".modules.expert_generation": ["GenerateExpertModule"],
+    ".modules.callback": ["BaseCallbackHandler"],
+    ".modules.collaborative_storm_utils": [
+        "format_search_results",
+        "extract_cited_storm_info",
+        "trim_output_after_hint",
+        "separate_citations",
+        "extract_and_remove_citations",
+        "keep_first_and_last_paragraph",
+        "clean_up_section",
+    ],
+    "..storm_wiki.modules.outline_generation": ["WritePageOutline"],
+    "..logging_wrapper": ["LoggingWrapper"],
+    ".engine": [
+        "CollaborativeStormLMConfigs",
+        "RunnerArgument",
+        "TurnPolicySpec",
+        "DiscourseManager",
+        "CoStormRunner",
+    ],
+}
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -15,6 +15,7 @@ from .modules.expert_generation import GenerateExpertModule
 from .modules.warmstart_hierarchical_chat import WarmStartModule
 from ..dataclass import ConversationTurn, KnowledgeBase
 from ..encoder import Encoder
+from ..http_session import configure_http_pool
 from ..interface import LMConfigs, Agent
 from ..logging_wrapper import LoggingWrapper
 from ..lm import LitellmModel
@@ -182,7 +183,8 @@ class CollaborativeStormLMConfigs(LMConfigs):
         """
         config_dict = {}
         for attr_name in self.__dict__:
-            config_dict[attr_name] = getattr(self, attr_name).kwargs
+            if "_lm" in attr_name:
+                config_dict[attr_name] = getattr(self, attr_name).kwargs
         return config_dict
 
 
@@ -266,6 +268,30 @@ class RunnerArgument:
         default=False,
         metadata={"help": "If True, switch to rag online baseline mode"},
     )
+    stream_report: bool = field(
+        default=False,
+        metadata={
+            "help": "If True, stream each report section to `callback_handler.on_section_token` as it is generated."
+        },
+    )
+    lm_history_max_entries: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "Maximum number of LM calls kept in memory per language model. None keeps all."
+        },
+    )
+    lm_history_max_bytes: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "Maximum size in bytes of the LM calls kept in memory per language model. None keeps all."
+        },
+    )
+    lm_history_sink_dir: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "If set, stream every LM call to a JSONL file in this directory instead of keeping the full history in memory."
+        },
+    )
 
     def to_dict(self):
         """
@@ -513,8 +539,19 @@ class CoStormRunner:
     ):
         self.runner_argument = runner_argument
         self.lm_config = lm_config
+        if (
+            runner_argument.lm_history_max_entries is not None
+            or runner_argument.lm_history_max_bytes is not None
+            or runner_argument.lm_history_sink_dir is not None
+        ):
+            self.lm_config.set_lm_history_policy(
+                max_entries=runner_argument.lm_history_max_entries,
+                max_bytes=runner_argument.lm_history_max_bytes,
+                sink_dir=runner_argument.lm_history_sink_dir,
+            )
         self.logging_wrapper = logging_wrapper
         self.callback_handler = callback_handler
+        configure_http_pool(runner_argument.max_thread_num)
         if rm is None:
             self.rm = BingSearch(k=runner_argument.retrieve_top_k)
         else:
@@ -653,7 +690,13 @@ class CoStormRunner:
             with self.logging_wrapper.log_event(
                 "report generation stage: generate report"
             ):
-                return self.knowledge_base.to_report()
+                return self.knowledge_base.to_report(
+                    callback_handler=(
+                        self.callback_handler
+                        if self.runner_argument.stream_report
+                        else None
+                    )
+                )
 
     def dump_logging_and_reset(self):
         return self.logging_wrapper.dump_logging_and_reset()
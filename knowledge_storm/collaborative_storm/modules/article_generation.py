@@ -1,9 +1,12 @@
 import dspy
+import functools
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Set, Union
 
+from .callback import BaseCallbackHandler
 from .collaborative_storm_utils import clean_up_section
 from ...dataclass import KnowledgeBase, KnowledgeNode
+from ...utils import stream_predict
 
 
 class ArticleGenerationModule(dspy.Module):
@@ -37,8 +40,13 @@ class ArticleGenerationModule(dspy.Module):
         return "\n".join(information)
 
     def gen_section(
-        self, topic: str, node: KnowledgeNode, knowledge_base: KnowledgeBase
+        self,
+        topic: str,
+        node: KnowledgeNode,
+        knowledge_base: KnowledgeBase,
+        callback_handler: BaseCallbackHandler = None,
     ):
+        """Writes the section of `node`, streaming its text to `callback_handler.on_section_token` if a handler is given."""
         if node is None or len(node.content) == 0:
             return ""
         if (
@@ -52,23 +60,39 @@ class ArticleGenerationModule(dspy.Module):
             all_citation_index=all_citation_index, knowledge_base=knowledge_base
         )
         with dspy.settings.context(lm=self.engine):
-            synthesize_output = clean_up_section(
-                self.write_section(
+            if callback_handler is None:
+                output = self.write_section(
                     topic=topic, info=information, section=node.name
                 ).output
-            )
+            else:
+                output = stream_predict(
+                    WriteSection,
+                    self.engine,
+                    functools.partial(callback_handler.on_section_token, node.name),
+                    topic=topic,
+                    info=information,
+                    section=node.name,
+                ).output
+            synthesize_output = clean_up_section(output)
         node.synthesize_output = synthesize_output
         node.need_regenerate_synthesize_output = False
         return node.synthesize_output
 
-    def forward(self, knowledge_base: KnowledgeBase):
+    def forward(
+        self,
+        knowledge_base: KnowledgeBase,
+        callback_handler: BaseCallbackHandler = None,
+    ):
         all_nodes = knowledge_base.collect_all_nodes()
         node_to_paragraph = {}
 
         # Define a function to generate paragraphs for nodes
         def _node_generate_paragraph(node):
             node_gen_paragraph = self.gen_section(
-                topic=knowledge_base.topic, node=node, knowledge_base=knowledge_base
+                topic=knowledge_base.topic,
+                node=node,
+                knowledge_base=knowledge_base,
+                callback_handler=callback_handler,
             )
             lines = node_gen_paragraph.split("\n")
             if lines[0].strip().replace("*", "").replace("#", "") == node.name:
@@ -114,8 +138,9 @@ class WriteSection(dspy.Signature):
     Use [1], [2], ..., [n] in line (for example, "The capital of the United States is Washington, D.C.[1][3]."). You DO NOT need to include a References or Sources section to list the sources at the end.
     """
 
-    info = dspy.InputField(prefix="The collected information:\n", format=str)
+    # `topic` comes first so that all sections of a report share a cacheable prompt prefix.
     topic = dspy.InputField(prefix="The topic of the page: ", format=str)
+    info = dspy.InputField(prefix="The collected information:\n", format=str)
     section = dspy.InputField(prefix="The section you need to write: ", format=str)
     output = dspy.OutputField(
         prefix="Write the section with proper inline citations (Start your writing. Don't include the page title, section name, or try to write other sections. Do not start the section with topic name.):\n",
@@ -53,6 +53,10 @@ class BaseCallbackHandler:
         """Run when the article generation process begins, to compile and format the final article content."""
         pass
 
+    def on_section_token(self, section_name: str, token: str, **kwargs):
+        """Run when a chunk of text is generated for a report section, if report streaming is enabled."""
+        pass
+
     def on_warmstart_update(self, message, **kwargs):
         """Run when the warm start process has update."""
         pass
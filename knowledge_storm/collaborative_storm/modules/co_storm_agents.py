@@ -13,7 +13,7 @@ from .costorm_expert_utterance_generator import CoStormExpertUtteranceGeneration
 from .grounded_question_generation import GroundedQuestionGenerationModule
 from .simulate_user import GenSimulatedUserUtterance
 from ...dataclass import ConversationTurn, KnowledgeBase
-from ...encoder import Encoder
+from ...encoder import Encoder, normalize_embeddings
 from ...interface import Agent, Information, LMConfigs
 from ...logging_wrapper import LoggingWrapper
 
@@ -201,7 +201,6 @@ class Moderator(Agent):
         # get all cited information
         cited_info = list(knowledge_base.info_uuid_to_info_dict.values())
         cited_info_hash_set = set([hash(info) for info in cited_info])
-        cited_snippets = [info.snippets[0] for info in cited_info]
         # get list of unused information
         unused_information: List[Information] = [
             info
@@ -218,16 +217,21 @@ class Moderator(Agent):
         )
         claim_embedding = self.encoder.encode(conv_turn.claim_to_make)
         query_embedding = self.encoder.encode(conv_turn.queries)
-        cited_snippets_embedding = self.encoder.encode(cited_snippets)
+        cited_snippets_embedding, _ = knowledge_base.get_cited_snippet_embeddings()
         # calculate similarity
         query_similarities = cosine_similarity(
             unused_snippets_embeddings, query_embedding
         )
         max_query_similarity = np.max(query_similarities, axis=1)
-        cited_snippets_similarity = np.max(
-            cosine_similarity(unused_snippets_embeddings, cited_snippets_embedding),
-            axis=1,
-        )
+        if cited_snippets_embedding.size > 0:
+            # cited snippet embeddings are already L2-normalized
+            cited_snippets_similarity = np.max(
+                normalize_embeddings(unused_snippets_embeddings)
+                @ cited_snippets_embedding.T,
+                axis=1,
+            )
+        else:
+            cited_snippets_similarity = np.zeros(len(unused_information))
         cited_snippets_similarity = np.clip(cited_snippets_similarity, 0, 1)
         # use claim similarity to filter out "real" not useful data
         claim_similarity = cosine_similarity(
@@ -4,15 +4,27 @@ import re
 import traceback
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Union, Dict, Optional
+from typing import List, Union, Dict, Optional, Tuple
 
 from .collaborative_storm_utils import trim_output_after_hint
 from ...dataclass import KnowledgeNode, KnowledgeBase
-from ...encoder import Encoder
+from ...encoder import Encoder, normalize_embeddings
 from ...interface import Information
 
 
+def _singularize(word: str) -> str:
+    """Folds the regular English plural of `word` ("impacts" -> "impact", "policies" -> "policy")."""
+    if len(word) <= 3 or not word.isalpha() or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
 class InsertInformation(dspy.Signature):
     """Your job is to insert the given information to the knowledge base. The knowledge base is a tree based data structure to organize the collection information. Each knowledge node contains information derived from themantically similar question or intent.
     To decide the best placement of the information, you will be navigated in this tree based data structure layer by layer.
@@ -29,10 +41,11 @@ class InsertInformation(dspy.Signature):
     - create: node3
     """
 
+    # `structure` comes first so that insertions passing through the same node share their prompt prefix.
+    structure = dspy.InputField(prefix="Tree structure: \n", format=str)
     intent = dspy.InputField(
         prefix="Question and query leads to this info: ", format=str
     )
-    structure = dspy.InputField(prefix="Tree structure: \n", format=str)
     choice = dspy.OutputField(prefix="Choice:\n", format=str)
 
 
@@ -153,14 +166,58 @@ class InsertInformationModule(dspy.Module):
         question: str,
         query: str,
     ):
-        if encoded_outline is not None and encoded_outline.size > 0:
-            encoded_query = self.encoder.encode(f"{question}, {query}")
-            sim = cosine_similarity([encoded_query], encoded_outline)[0]
-            sorted_indices = np.argsort(sim)
-            sorted_outlines = np.array(outlines)[sorted_indices[::-1]]
-            return sorted_outlines
+        return self._get_top_embed_sim_sections(
+            encoded_outline, outlines, [(question, query)], top_N=len(outlines)
+        )[(question, query)]
+
+    def _get_top_embed_sim_sections(
+        self,
+        encoded_outline: np.ndarray,
+        outlines: List[str],
+        intents: List[Tuple[str, str]],
+        top_N: int,
+    ) -> Dict[Tuple[str, str], List[str]]:
+        """
+        Ranks outline paths for a batch of intents with one embedding call and one matrix product.
+
+        Args:
+            encoded_outline (np.ndarray): The (num_outlines, dim) embeddings of the outline paths.
+            outlines (List[str]): The outline paths.
+            intents (List[Tuple[str, str]]): (question, query) pairs to rank the outline paths for.
+            top_N (int): The number of most similar outline paths to keep per intent.
+
+        Returns:
+            Dict[Tuple[str, str], List[str]]: The top_N outline paths of each intent, most similar first.
+        """
+        top_N = min(top_N, len(outlines))
+        if encoded_outline is None or encoded_outline.size == 0 or not intents:
+            return {intent: list(outlines[:top_N]) for intent in intents}
+
+        encoded_queries, failed = self.encoder.encode(
+            [f"{question}, {query}" for question, query in intents],
+            return_failed_mask=True,
+        )
+        # (intents x outline paths) cosine similarity
+        sim = (
+            normalize_embeddings(encoded_queries)
+            @ normalize_embeddings(encoded_outline).T
+        )
+        if top_N < len(outlines):
+            top_indices = np.argpartition(-sim, top_N - 1, axis=1)[:, :top_N]
         else:
-            return outlines
+            top_indices = np.broadcast_to(np.arange(len(outlines)), sim.shape)
+        top_sim = np.take_along_axis(sim, top_indices, axis=1)
+        top_indices = np.take_along_axis(
+            top_indices, np.argsort(-top_sim, axis=1), axis=1
+        )
+        return {
+            intent: (
+                list(outlines[:top_N])
+                if is_failed
+                else [outlines[idx] for idx in top_indices[row]]
+            )
+            for row, (intent, is_failed) in enumerate(zip(intents, failed))
+        }
 
     def _parse_selected_index(self, string: str):
         match = re.search(r"\[(\d+)\]", string)
@@ -179,10 +236,12 @@ class InsertInformationModule(dspy.Module):
         encoded_outlines: np.ndarray,
         outlines: List[str],
         top_N_candidates: int = 5,
+        sorted_candidates: Optional[List[str]] = None,
     ):
-        sorted_candidates = self._get_sorted_embed_sim_section(
-            encoded_outlines, outlines, question, query
-        )
+        if sorted_candidates is None:
+            sorted_candidates = self._get_sorted_embed_sim_section(
+                encoded_outlines, outlines, question, query
+            )
         considered_candidates = sorted_candidates[
             : min(len(sorted_candidates), top_N_candidates)
         ]
@@ -210,6 +269,79 @@ class InsertInformationModule(dspy.Module):
                         )
             return None
 
+    def _normalize_node_name(self, name: str):
+        # lowercase, collapse punctuation and whitespace and fold plurals
+        # ("Economic-Impacts" -> "economic impact"); numbers are kept, so "World War I" and
+        # "World War II" stay apart
+        words = re.sub(r"[^a-z0-9]+", " ", name.lower()).split()
+        return " ".join(_singularize(word) for word in words)
+
+    def _match_node_name(self, name: str, known_names: List[Tuple[str, str]]):
+        """
+        Returns the known node name that `name` duplicates, or registers `name` as a new one.
+
+        Args:
+            name (str): The node name proposed by a placement.
+            known_names (List[Tuple[str, str]]): (normalized name, name) of nodes under the same parent,
+                including nodes created by placements reconciled earlier.
+        """
+        normalized_name = self._normalize_node_name(name)
+        for known_normalized_name, known_name in known_names:
+            if normalized_name == known_normalized_name:
+                return known_name
+        known_names.append((normalized_name, name))
+        return name
+
+    def _reconcile_new_node_placements(
+        self,
+        knowledge_base: KnowledgeBase,
+        intent_to_placement_dict: Dict,
+        root: Optional[KnowledgeNode] = None,
+    ):
+        """
+        Merges `create:` decisions that were proposed concurrently against the same tree.
+
+        Placements are visited in intent order. A new node name that duplicates an existing child or a
+        node created by an earlier placement under the same parent is replaced by that name, so the
+        serialized insertion afterwards creates each new node only once. Names match if they are
+        equal up to case, whitespace, punctuation and plural forms ("Economic Impact" and
+        "economic impacts"), while similar but distinct sections such as "World War I" and
+        "World War II" stay apart.
+        """
+        # parent path -> (normalized name, name) of existing and to-be-created children
+        known_children: Dict[str, List[Tuple[str, str]]] = {}
+        for intent, placement_prediction in intent_to_placement_dict.items():
+            if placement_prediction is None:
+                continue
+            node_names = placement_prediction.information_placement.split(" -> ")
+            current_node = knowledge_base.root if root is None else root
+            reconciled_names = node_names[:1]
+            for name in node_names[1:]:
+                found_node = None
+                if current_node is not None:
+                    found_node = next(
+                        (c for c in current_node.children if c.name == name), None
+                    )
+                if found_node is None:
+                    parent_path = " -> ".join(reconciled_names)
+                    if parent_path not in known_children:
+                        known_children[parent_path] = [
+                            (self._normalize_node_name(child.name), child.name)
+                            for child in (current_node.children if current_node else [])
+                        ]
+                    name = self._match_node_name(name, known_children[parent_path])
+                    if current_node is not None:
+                        found_node = next(
+                            (c for c in current_node.children if c.name == name), None
+                        )
+                reconciled_names.append(name)
+                current_node = found_node
+            if reconciled_names != node_names:
+                intent_to_placement_dict[intent] = dspy.Prediction(
+                    information_placement=" -> ".join(reconciled_names),
+                    note=f"{placement_prediction.note}\nmerged into existing placement: {{{reconciled_names[-1]}}}",
+                )
+
     def _info_list_to_intent_mapping(self, information_list: List[Information]):
         intent_to_placement_dict = {}
         for info in information_list:
@@ -226,15 +358,46 @@ class InsertInformationModule(dspy.Module):
         max_thread: int = 5,
         insert_root: Optional[KnowledgeNode] = None,
         skip_candidate_from_embedding: bool = False,
+        concurrent_placement: bool = False,
     ):
+        """
+        Places each piece of information in the knowledge base and inserts it.
+
+        Args:
+            knowledge_base (KnowledgeBase): The knowledge base to insert into.
+            information (Union[Information, List[Information]]): The information to insert.
+            allow_create_new_node (bool): Whether placements may create new nodes.
+            max_thread (int): The maximum number of placements computed in parallel.
+            insert_root (Optional[KnowledgeNode]): Only place information under this node.
+            skip_candidate_from_embedding (bool): Skip the embedding-ranked candidate choice and
+                always navigate the tree layer by layer.
+            concurrent_placement (bool): When new nodes are allowed, propose the placements of all
+                intents in parallel against the current tree and reconcile duplicated new nodes in
+                one serialized step. If False, placements are proposed one intent at a time.
+        """
         if not isinstance(information, List):
             information = [information]
         intent_to_placement_dict: Dict = self._info_list_to_intent_mapping(
             information_list=information
         )
 
+        top_N_candidates = 8
+
+        def rank_candidates(intents: List[Tuple[str, str]]):
+            if skip_candidate_from_embedding:
+                return {}
+            try:
+                return self._get_top_embed_sim_sections(
+                    encoded_outlines, outlines, intents, top_N=top_N_candidates
+                )
+            except Exception as e:
+                print(traceback.format_exc())
+                return {}
+
         # process one intent
-        def process_intent(question: str, query: str):
+        def process_intent(
+            question: str, query: str, sorted_candidates: Optional[List[str]] = None
+        ):
             candidate_placement = None
             try:
                 if not skip_candidate_from_embedding:
@@ -243,7 +406,8 @@ class InsertInformationModule(dspy.Module):
                         query=query,
                         encoded_outlines=encoded_outlines,
                         outlines=outlines,
-                        top_N_candidates=8,
+                        top_N_candidates=top_N_candidates,
+                        sorted_candidates=sorted_candidates,
                     )
                 if candidate_placement is None:
                     candidate_placement = self.layer_by_layer_navigation_placement(
@@ -274,27 +438,32 @@ class InsertInformationModule(dspy.Module):
             encoded_outlines,
             outlines,
         ) = knowledge_base.get_knowledge_base_structure_embedding(root=insert_root)
-        to_return = []
-        if not allow_create_new_node:
-            # use multi thread as knowledge base structure does not change
+        if not allow_create_new_node or concurrent_placement:
+            # Placements only read the tree, which is not modified until all placements are
+            # proposed, so they can be computed in parallel.
+            ranked_candidates = rank_candidates(list(intent_to_placement_dict))
             with ThreadPoolExecutor(max_workers=max_thread) as executor:
                 futures = {
-                    executor.submit(process_intent, question, query): (question, query)
+                    executor.submit(
+                        process_intent,
+                        question,
+                        query,
+                        ranked_candidates.get((question, query)),
+                    ): (question, query)
                     for (question, query) in intent_to_placement_dict
                 }
 
                 for future in as_completed(futures):
                     (question, query), candidate_placement = future.result()
                     intent_to_placement_dict[(question, query)] = candidate_placement
-            # back mapping placement to each information
-            for info in information:
-                intent = (info.meta.get("question", ""), info.meta.get("query", ""))
-                placement_prediction = intent_to_placement_dict.get(intent, None)
-                insert_info_to_kb(info, placement_prediction)
-                to_return.append((info, placement_prediction))
-            return to_return
+            if allow_create_new_node:
+                self._reconcile_new_node_placements(
+                    knowledge_base=knowledge_base,
+                    intent_to_placement_dict=intent_to_placement_dict,
+                    root=insert_root,
+                )
         else:
-            # use sequential insert as knowledge base structure might change
+            # use sequential placement as knowledge base structure might change
             for question, query in intent_to_placement_dict:
                 (
                     encoded_outlines,
@@ -302,15 +471,22 @@ class InsertInformationModule(dspy.Module):
                 ) = knowledge_base.get_knowledge_base_structure_embedding(
                     root=insert_root
                 )
-                _, placement_prediction = process_intent(question=question, query=query)
+                ranked_candidates = rank_candidates([(question, query)])
+                _, placement_prediction = process_intent(
+                    question=question,
+                    query=query,
+                    sorted_candidates=ranked_candidates.get((question, query)),
+                )
                 intent_to_placement_dict[(question, query)] = placement_prediction
 
-            for info in information:
-                intent = (info.meta.get("question", ""), info.meta.get("query", ""))
-                placement_prediction = intent_to_placement_dict.get(intent, None)
-                insert_info_to_kb(info, placement_prediction)
-                to_return.append((info, placement_prediction))
-            return to_return
+        # back mapping placement to each information, inserting one at a time
+        to_return = []
+        for info in information:
+            intent = (info.meta.get("question", ""), info.meta.get("query", ""))
+            placement_prediction = intent_to_placement_dict.get(intent, None)
+            insert_info_to_kb(info, placement_prediction)
+            to_return.append((info, placement_prediction))
+        return to_return
 
 
 class ExpandSection(dspy.Signature):
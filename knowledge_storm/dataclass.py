@@ -1,10 +1,11 @@
+import base64
 import dspy
 import numpy as np
 import re
 import threading
 from typing import Set, Dict, List, Optional, Union, Tuple
 
-from .encoder import Encoder
+from .encoder import Encoder, normalize_embeddings
 from .interface import Information
 
 
@@ -355,9 +356,19 @@ class KnowledgeBase:
             "encoded_structure": np.array([[]]),
             "structure_string": "",
         }
+        # Embedding of every outline path encoded so far, so a structure change only encodes
+        # the new or renamed paths.
+        self.structure_path_to_embedding: Dict[str, np.ndarray] = {}
         self.info_uuid_to_info_dict: Dict[int, Information] = {}
         self.info_hash_to_uuid_dict: Dict[int, int] = {}
         self._lock = threading.Lock()
+        # Append-only index of L2-normalized embeddings of cited snippets. Row i belongs to
+        # cited_snippet_uuids[i]; newly cited information waits in the pending list until the
+        # next call to get_cited_snippet_embeddings() encodes it in one batch.
+        self.cited_snippet_embeddings: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self.cited_snippet_uuids: List[int] = []
+        self._pending_snippet_uuids: List[int] = []
+        self._snippet_embedding_lock = threading.Lock()
 
     def to_dict(self):
         info_uuid_to_info_dict = {
@@ -368,6 +379,14 @@ class KnowledgeBase:
             "tree": self.root.to_dict(),
             "info_uuid_to_info_dict": info_uuid_to_info_dict,
             "info_hash_to_uuid_dict": self.info_hash_to_uuid_dict,
+            "cited_snippet_embeddings": {
+                "model": self.encoder.embedding_model_name,
+                "citation_uuids": self.cited_snippet_uuids,
+                "shape": list(self.cited_snippet_embeddings.shape),
+                "data": base64.b64encode(
+                    self.cited_snippet_embeddings.astype(np.float32).tobytes()
+                ).decode("ascii"),
+            },
         }
 
     @classmethod
@@ -394,8 +413,69 @@ class KnowledgeBase:
             for key, value in data["info_uuid_to_info_dict"].items()
         }
         knowledge_base.info_uuid_to_info_dict = info_uuid_to_info_dict
+        snippet_index = data.get("cited_snippet_embeddings")
+        if snippet_index is not None and snippet_index.get("model") == (
+            encoder.embedding_model_name
+        ):
+            knowledge_base.cited_snippet_embeddings = np.frombuffer(
+                base64.b64decode(snippet_index["data"]), dtype=np.float32
+            ).reshape(snippet_index["shape"])
+            knowledge_base.cited_snippet_uuids = [
+                int(uuid) for uuid in snippet_index["citation_uuids"]
+            ]
+        indexed_uuids = set(knowledge_base.cited_snippet_uuids)
+        knowledge_base._pending_snippet_uuids = [
+            uuid for uuid in info_uuid_to_info_dict if uuid not in indexed_uuids
+        ]
         return knowledge_base
 
+    def get_cited_snippet_embeddings(self) -> Tuple[np.ndarray, List[int]]:
+        """
+        Returns the embeddings of all cited snippets, encoding only the ones cited since the last call.
+
+        Returns:
+            Tuple[np.ndarray, List[int]]: The (num_cited_snippets, dim) float32 matrix of L2-normalized
+                snippet embeddings and the citation uuid of each row.
+        """
+        with self._snippet_embedding_lock:
+            with self._lock:
+                pending_uuids = self._pending_snippet_uuids
+                self._pending_snippet_uuids = []
+            pending_uuids = [
+                uuid
+                for uuid in pending_uuids
+                if self.info_uuid_to_info_dict[uuid].snippets
+            ]
+            if pending_uuids:
+                encoded, failed = self.encoder.encode(
+                    [
+                        self.info_uuid_to_info_dict[uuid].snippets[0]
+                        for uuid in pending_uuids
+                    ],
+                    max_workers=20,
+                    return_failed_mask=True,
+                )
+                encoded = normalize_embeddings(encoded[~failed])
+                if self.cited_snippet_embeddings.size == 0:
+                    self.cited_snippet_embeddings = encoded
+                elif encoded.shape[0] > 0:
+                    self.cited_snippet_embeddings = np.vstack(
+                        [self.cited_snippet_embeddings, encoded]
+                    )
+                self.cited_snippet_uuids = self.cited_snippet_uuids + [
+                    uuid
+                    for uuid, is_failed in zip(pending_uuids, failed)
+                    if not is_failed
+                ]
+                # Keep failed snippets pending so they are retried on the next call.
+                with self._lock:
+                    self._pending_snippet_uuids = [
+                        uuid
+                        for uuid, is_failed in zip(pending_uuids, failed)
+                        if is_failed
+                    ] + self._pending_snippet_uuids
+            return self.cited_snippet_embeddings, self.cited_snippet_uuids
+
     def get_knowledge_base_structure_embedding(
         self, root: Optional[KnowledgeNode] = None
     ) -> Tuple[np.ndarray, List[str]]:
@@ -407,21 +487,66 @@ class KnowledgeBase:
         )
         outline_string_hash = hash(outline_string)
         if outline_string_hash != self.kb_embedding["hash"]:
-            outline_strings: List[str] = outline_string.split("\n")
+            outline_strings: List[str] = [
+                outline for outline in outline_string.split("\n") if outline
+            ]
             cleaned_outline_strings = [
                 outline.replace(" -> ", ", ") for outline in outline_strings
             ]
-            encoded_outline = self.encoder.encode(cleaned_outline_strings)
+            new_paths = [
+                path
+                for path in dict.fromkeys(cleaned_outline_strings)
+                if path not in self.structure_path_to_embedding
+            ]
+            has_failure = False
+            if new_paths:
+                encoded_paths, failed = self.encoder.encode(
+                    new_paths, return_failed_mask=True
+                )
+                has_failure = bool(failed.any())
+                for path, embedding, is_failed in zip(new_paths, encoded_paths, failed):
+                    if not is_failed:
+                        self.structure_path_to_embedding[path] = embedding
+            # only keep paths with an embedding so the matrix rows and path list line up
+            embedded = [
+                (outline, self.structure_path_to_embedding[cleaned])
+                for outline, cleaned in zip(outline_strings, cleaned_outline_strings)
+                if cleaned in self.structure_path_to_embedding
+            ]
             self.kb_embedding = {
-                "hash": outline_string_hash,
-                "encoded_structure": encoded_outline,
-                "structure_string": outline_strings,
+                # leave the hash unset on failure so missing paths are retried next time
+                "hash": None if has_failure else outline_string_hash,
+                "encoded_structure": (
+                    np.stack([embedding for _, embedding in embedded])
+                    if embedded
+                    else np.zeros((0, 0), dtype=np.float32)
+                ),
+                "structure_string": [outline for outline, _ in embedded],
             }
         return (
             self.kb_embedding["encoded_structure"],
             self.kb_embedding["structure_string"],
         )
 
+    def _prune_structure_embeddings(self):
+        """
+        Drops cached outline path embeddings that no longer exist in the tree, e.g. after nodes are
+        trimmed or merged.
+        """
+        current_paths = set(
+            outline.replace(" -> ", ", ")
+            for outline in self.get_node_hierarchy_string(
+                include_indent=False,
+                include_full_path=True,
+                include_hash_tag=False,
+            ).split("\n")
+        )
+        self.structure_path_to_embedding = {
+            path: embedding
+            for path, embedding in self.structure_path_to_embedding.items()
+            if path in current_paths
+        }
+
     def traverse_down(self, node):
         """
         Traverses the tree downward from the given node.
@@ -704,6 +829,8 @@ class KnowledgeBase:
                     information_hash, len(self.info_hash_to_uuid_dict) + 1
                 )
                 information.citation_uuid = info_citation_uuid
+                if info_citation_uuid not in self.info_uuid_to_info_dict:
+                    self._pending_snippet_uuids.append(info_citation_uuid)
                 self.info_hash_to_uuid_dict[information_hash] = info_citation_uuid
                 self.info_uuid_to_info_dict[info_citation_uuid] = information
             if target_node is not None:
@@ -730,6 +857,7 @@ class KnowledgeBase:
             after_trim = len(self.get_all_leaf_nodes())
             if before_trim == after_trim:
                 break
+        self._prune_structure_embeddings()
 
     def get_all_leaf_nodes(self):
         """
@@ -769,6 +897,7 @@ class KnowledgeBase:
                     grandchild.parent = node
 
         merge_node(self.root)
+        self._prune_structure_embeddings()
 
     def update_all_info_path(self):
         def _helper(node):
@@ -845,5 +974,7 @@ class KnowledgeBase:
         self.merge_single_child_nodes()
         self.update_all_info_path()
 
-    def to_report(self):
-        return self.article_generation_module(knowledge_base=self)
+    def to_report(self, callback_handler=None):
+        return self.article_generation_module(
+            knowledge_base=self, callback_handler=callback_handler
+        )
@@ -1,9 +1,16 @@
+import hashlib
 import os
+import threading
 import numpy as np
 
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Tuple, Union, Optional, Dict, Literal
-from pathlib import Path
+from typing import List, Tuple, Union, Optional, Dict, Literal, Iterable, TYPE_CHECKING
+
+from .cache import get_response_cache
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 try:
     import warnings
@@ -17,11 +24,6 @@ try:
         litellm.drop_params = True
         litellm.telemetry = False
 
-    from litellm.caching.caching import Cache
-
-    disk_cache_dir = os.path.join(Path.home(), ".storm_local_cache")
-    litellm.cache = Cache(disk_cache_dir=disk_cache_dir, type="disk")
-
 except ImportError:
 
     class LitellmPlaceholder:
@@ -33,6 +35,218 @@ except ImportError:
     litellm = LitellmPlaceholder()
 
 
+DEFAULT_SENTENCE_TRANSFORMER = "paraphrase-MiniLM-L6-v2"
+# Output size of text-embedding-3-small, used to shape the result before any request succeeded.
+DEFAULT_EMBEDDING_DIM = 1536
+_sentence_transformers: Dict[Tuple[str, Optional[str]], "SentenceTransformer"] = {}
+_sentence_transformers_lock = threading.Lock()
+
+
+def get_sentence_transformer(
+    model_name: str = DEFAULT_SENTENCE_TRANSFORMER, device: Optional[str] = None
+) -> "SentenceTransformer":
+    """
+    Returns the process-wide shared SentenceTransformer for (model_name, device), loading it on first use.
+
+    Args:
+        model_name (str): Name or path of the sentence-transformers model.
+        device (Optional[str]): Device to load the model on (e.g. 'cpu', 'cuda'). None lets
+            sentence-transformers pick one.
+    """
+    key = (model_name, device)
+    model = _sentence_transformers.get(key)
+    if model is None:
+        with _sentence_transformers_lock:
+            model = _sentence_transformers.get(key)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+
+                model = SentenceTransformer(model_name, device=device)
+                _sentence_transformers[key] = model
+    return model
+
+
+def preload_sentence_transformers(
+    model_names: Iterable[str] = (DEFAULT_SENTENCE_TRANSFORMER,),
+    device: Optional[str] = None,
+):
+    """
+    Loads the given SentenceTransformer models into the shared registry, e.g. at process start so
+    that the first article generation does not pay for loading model weights.
+    """
+    for model_name in model_names:
+        get_sentence_transformer(model_name, device=device)
+
+
+# HTTP statuses with which embedding providers reject the input itself (e.g. a text over the
+# per-input token limit), as opposed to rate limits, timeouts and server errors.
+_INPUT_ERROR_STATUS_CODES = {400, 413, 422}
+
+
+def _is_input_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) in _INPUT_ERROR_STATUS_CODES
+
+
+def _estimate_num_tokens(text: str) -> int:
+    """Cheap token count estimate (about 4 characters per token) used to size batches."""
+    return len(text) // 4 + 1
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """
+    L2-normalizes embeddings along the last axis so cosine similarity becomes a dot product.
+
+    Zero rows (e.g. texts whose embedding request failed) are left as zeros.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingCache:
+    """
+    A thread-safe in-memory LRU cache of embedding vectors, keyed by (model, text hash).
+
+    The cache sits in front of the persistent cache configured with `configure_response_cache`, so
+    that strings encoded moments ago do not go back through the disk layer, while embeddings
+    computed by other processes or earlier runs are still reused. Entries are evicted in
+    least-recently-used order once the stored vectors exceed `max_bytes`. A single instance can be
+    shared by several `Encoder`s.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, persistent: bool = True):
+        """
+        Args:
+            max_bytes (int): Memory budget for the stored vectors. Set to 0 to disable in-memory caching.
+            persistent (bool): Whether to read and write through the persistent response cache.
+        """
+        self.max_bytes = max_bytes
+        self.persistent = persistent
+        self._entries: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+        self._num_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+
+    @staticmethod
+    def _key(model: str, text: str) -> Tuple[str, bytes]:
+        return model, hashlib.sha256(text.encode("utf-8")).digest()
+
+    @staticmethod
+    def _persistent_key(model: str, text: str) -> str:
+        return f"{model}\n{text}"
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up several texts, first in memory and then in the persistent cache in one query.
+
+        Returns:
+            List[Optional[np.ndarray]]: The cached embeddings in the order of `texts`, None for misses.
+        """
+        embeddings = []
+        missing = []
+        with self._lock:
+            for idx, text in enumerate(texts):
+                key = self._key(model, text)
+                embedding = self._entries.get(key)
+                if embedding is None:
+                    missing.append(idx)
+                else:
+                    self._entries.move_to_end(key)
+                embeddings.append(embedding)
+
+        num_persistent_hits = 0
+        response_cache = get_response_cache() if self.persistent and missing else None
+        if response_cache is not None:
+            stored = response_cache.get_many(
+                "embedding",
+                [self._persistent_key(model, texts[idx]) for idx in missing],
+            )
+            for idx, embedding in zip(missing, stored):
+                if embedding is not None:
+                    embeddings[idx] = self._remember(model, texts[idx], embedding)
+                    num_persistent_hits += 1
+
+        with self._lock:
+            num_misses = len(missing) - num_persistent_hits
+            self.hits += len(texts) - num_misses
+            self.misses += num_misses
+            self.persistent_hits += num_persistent_hits
+        return embeddings
+
+    def put(self, model: str, text: str, embedding: np.ndarray):
+        self.put_many(model, [text], [embedding])
+
+    def put_many(self, model: str, texts: List[str], embeddings: Iterable[np.ndarray]):
+        """Stores several embeddings in memory and, in one transaction, in the persistent cache."""
+        embeddings = [
+            self._remember(model, text, embedding)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        response_cache = get_response_cache() if self.persistent and texts else None
+        if response_cache is not None:
+            response_cache.put_many(
+                "embedding",
+                [
+                    (self._persistent_key(model, text), embedding)
+                    for text, embedding in zip(texts, embeddings)
+                ],
+            )
+
+    def _remember(self, model: str, text: str, embedding: np.ndarray) -> np.ndarray:
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        if embedding.nbytes > self.max_bytes:
+            return embedding
+        key = self._key(model, text)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._num_bytes -= previous.nbytes
+            self._entries[key] = embedding
+            self._num_bytes += embedding.nbytes
+            while self._num_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._num_bytes -= evicted.nbytes
+        return embedding
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+
+    def get_stats(self, reset: bool = False) -> Dict[str, Union[int, float]]:
+        """
+        Retrieves the hit/miss counters and the current size of the cache.
+
+        Args:
+            reset (bool): If True, resets the hit/miss counters after retrieval.
+
+        Returns:
+            Dict[str, Union[int, float]]: hits (of which persistent_hits were served from the
+                persistent cache), misses, hit_rate, and the in-memory entries and bytes.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._num_bytes,
+            }
+            if reset:
+                self.hits = 0
+                self.misses = 0
+                self.persistent_hits = 0
+        return stats
+
+
 class Encoder:
     """
     A wrapper class for the LiteLLM embedding model, designed to handle embedding
@@ -46,7 +260,8 @@ class Encoder:
     Features:
         - Support for multiple embedding models (e.g., OpenAI, Azure).
         - Parallel processing for faster embedding generation.
-        - Local disk caching to store and reuse embedding results.
+        - Batched requests that pack many texts into a single embedding API call.
+        - In-memory LRU caching in front of local disk caching to store and reuse embedding results.
         - Total token usage tracking for cost monitoring.
 
     Note:
@@ -60,6 +275,10 @@ class Encoder:
         api_key: Optional[str] = None,
         api_base: Optional[str] = None,
         api_version: Optional[str] = None,
+        batch_size: int = 64,
+        max_tokens_per_batch: int = 64000,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_cache_max_bytes: int = 256 * 1024 * 1024,
     ):
         """
         Initializes the Encoder with the appropriate embedding model.
@@ -69,10 +288,27 @@ class Encoder:
             api_key (Optional[str]): API key for the encoder service.
             api_base (Optional[str]): API base URL for the encoder service.
             api_version (Optional[str]): API version for the encoder service.
+            batch_size (int): Maximum number of texts packed into one embedding request.
+                Set to 1 to send one request per distinct text.
+            max_tokens_per_batch (int): Approximate upper bound on the input tokens packed
+                into one embedding request.
+            embedding_cache (Optional[EmbeddingCache]): In-memory embedding cache to use, e.g. one
+                shared with other encoders. A new cache is created if not provided.
+            embedding_cache_max_bytes (int): Memory budget of the newly created in-memory cache.
+                Ignored if `embedding_cache` is provided. Set to 0 to disable in-memory caching.
         """
         self.embedding_model_name = None
+        self.embedding_dim = DEFAULT_EMBEDDING_DIM
         self.kargs = {}
         self.total_token_usage = 0
+        self.batch_size = max(1, batch_size)
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self._token_usage_lock = threading.Lock()
+        self.embedding_cache = (
+            embedding_cache
+            if embedding_cache is not None
+            else EmbeddingCache(max_bytes=embedding_cache_max_bytes)
+        )
 
         # Initialize the appropriate embedding model
         encoder_type = encoder_type or os.getenv("ENCODER_API_TYPE")
@@ -104,75 +340,225 @@ class Encoder:
         Returns:
             int: The total number of tokens used.
         """
-        token_usage = self.total_token_usage
-        if reset:
-            self.total_token_usage = 0
+        with self._token_usage_lock:
+            token_usage = self.total_token_usage
+            if reset:
+                self.total_token_usage = 0
         return token_usage
 
-    def encode(self, texts: Union[str, List[str]], max_workers: int = 5) -> np.ndarray:
+    def get_cache_stats(self, reset: bool = False) -> Dict[str, Union[int, float]]:
+        """
+        Retrieves the hit/miss counters of the in-memory embedding cache.
+
+        Args:
+            reset (bool): If True, resets the counters after retrieval.
+
+        Returns:
+            Dict[str, Union[int, float]]: hits, misses, hit_rate, entries and bytes.
+        """
+        return self.embedding_cache.get_stats(reset=reset)
+
+    def _add_token_usage(self, tokens: int):
+        with self._token_usage_lock:
+            self.total_token_usage += tokens
+
+    def encode(
+        self,
+        texts: Union[str, List[str]],
+        max_workers: int = 5,
+        return_failed_mask: bool = False,
+    ) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
         """
         Public method to get embeddings for the given texts.
 
         Args:
             texts (Union[str, List[str]]): A single text string or a list of text strings to embed.
+            max_workers (int): The maximum number of concurrent embedding requests.
+            return_failed_mask (bool): If True, also return a boolean array marking the texts whose
+                embedding request failed. Rows of failed texts are left as zeros.
 
         Returns:
-            np.ndarray: The array of embeddings.
+            np.ndarray: The float32 array of embeddings, one row per input text. A single text string
+                gives a 1D array. If `return_failed_mask` is True, a tuple of the embeddings and the
+                failure mask is returned instead.
         """
-        return self._get_text_embeddings(texts, max_workers=max_workers)
+        embeddings, failed = self._get_text_embeddings(texts, max_workers=max_workers)
+        if return_failed_mask:
+            return embeddings, failed
+        return embeddings
 
-    def _get_single_text_embedding(self, text):
+    def _get_batch_text_embedding(self, batch: List[str]):
         response = litellm.embedding(
-            model=self.embedding_model_name, input=text, caching=True, **self.kargs
+            model=self.embedding_model_name, input=batch, caching=True, **self.kargs
         )
-        embedding = response.data[0]["embedding"]
+        embeddings = [None] * len(batch)
+        for position, item in enumerate(response.data):
+            embeddings[item.get("index", position)] = item["embedding"]
+        if any(embedding is None for embedding in embeddings):
+            raise ValueError(
+                f"Embedding response is missing rows for a batch of {len(batch)} texts."
+            )
         token_usage = response.get("usage", {}).get("total_tokens", 0)
-        return text, embedding, token_usage
+        return embeddings, token_usage
+
+    def _get_batch_text_embedding_or_bisect(
+        self, batch: List[str]
+    ) -> Tuple[List[Optional[List[float]]], int]:
+        """
+        Like `_get_batch_text_embedding`, but texts that fail get None instead of an embedding.
+
+        If the provider rejects the input of a batch (e.g. one text is over its token limit), the
+        batch is split in halves and retried, so that only the texts that fail on their own are
+        lost. Other errors, such as rate limits and timeouts, fail the whole batch without further
+        requests, which would only add to the load.
+        """
+        try:
+            return self._get_batch_text_embedding(batch)
+        except Exception as e:
+            if len(batch) == 1 or not _is_input_error(e):
+                print(f"An error occurred for a batch of {len(batch)} texts")
+                print(e)
+                return [None] * len(batch), 0
+        middle = len(batch) // 2
+        first_embeddings, first_tokens = self._get_batch_text_embedding_or_bisect(
+            batch[:middle]
+        )
+        second_embeddings, second_tokens = self._get_batch_text_embedding_or_bisect(
+            batch[middle:]
+        )
+        return first_embeddings + second_embeddings, first_tokens + second_tokens
+
+    def _pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Packs the positions of `texts` into batches bounded by `batch_size` and `max_tokens_per_batch`.
+        """
+        batches = []
+        current_batch, current_tokens = [], 0
+        for idx, text in enumerate(texts):
+            num_tokens = _estimate_num_tokens(text)
+            if current_batch and (
+                len(current_batch) >= self.batch_size
+                or current_tokens + num_tokens > self.max_tokens_per_batch
+            ):
+                batches.append(current_batch)
+                current_batch, current_tokens = [], 0
+            current_batch.append(idx)
+            current_tokens += num_tokens
+        if current_batch:
+            batches.append(current_batch)
+        return batches
+
+    def _encode_unique_texts(
+        self, texts: List[str], max_workers: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encodes a list of distinct texts, one embedding request per batch.
+
+        Args:
+            texts (List[str]): A list of distinct text strings to embed.
+            max_workers (int): The maximum number of batch requests in flight at the same time.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The float32 embedding matrix in input order and a boolean
+                mask of the texts that could not be embedded.
+        """
+        batches = self._pack_batches(texts)
+        embeddings = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._get_batch_text_embedding_or_bisect,
+                    [texts[idx] for idx in batch],
+                ): batch
+                for batch in batches
+            }
+
+            for future in as_completed(futures):
+                batch = futures[future]
+                batch_embeddings, tokens = future.result()
+                self._add_token_usage(tokens)
+                for idx, embedding in zip(batch, batch_embeddings):
+                    if embedding is not None:
+                        embeddings[idx] = embedding
+
+        if embeddings:
+            self.embedding_dim = len(next(iter(embeddings.values())))
+        matrix = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        failed = np.ones(len(texts), dtype=bool)
+        for idx, embedding in embeddings.items():
+            matrix[idx] = embedding
+            failed[idx] = False
+        return matrix, failed
 
     def _get_text_embeddings(
         self,
         texts: Union[str, List[str]],
         max_workers: int = 5,
-    ) -> Tuple[np.ndarray, int]:
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Get text embeddings using OpenAI's text-embedding-3-small model.
+        Get text embeddings with the configured embedding model.
+
+        Duplicate strings are encoded only once and their embeddings are scattered back to every
+        position they occur at, so the output always has one row per input text.
 
         Args:
             texts (Union[str, List[str]]): A single text string or a list of text strings to embed.
             max_workers (int): The maximum number of workers for parallel processing.
-            api_key (str): The API key for accessing OpenAI's services.
-            embedding_cache (Optional[Dict[str, np.ndarray]]): A cache to store previously computed embeddings.
 
         Returns:
-            Tuple[np.ndarray, int]: The 2D array of embeddings and the total token usage.
+            Tuple[np.ndarray, np.ndarray]: The float32 embeddings and a boolean mask of failed texts.
         """
 
         if isinstance(texts, str):
-            _, embedding, tokens = self._get_single_text_embedding(texts)
-            self.total_token_usage += tokens
-            return np.array(embedding)
-
-        embeddings = []
-        total_tokens = 0
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(self._get_single_text_embedding, text): text
-                for text in texts
-            }
+            embedding = self.embedding_cache.get(self.embedding_model_name, texts)
+            if embedding is None:
+                embeddings, tokens = self._get_batch_text_embedding([texts])
+                self._add_token_usage(tokens)
+                self.embedding_cache.put(
+                    self.embedding_model_name, texts, embeddings[0]
+                )
+                embedding = embeddings[0]
+            return np.array(embedding, dtype=np.float32), np.array(False)
+
+        unique_texts = []
+        text_to_unique_idx = {}
+        positions = np.empty(len(texts), dtype=np.int64)
+        for idx, text in enumerate(texts):
+            unique_idx = text_to_unique_idx.get(text)
+            if unique_idx is None:
+                unique_idx = text_to_unique_idx[text] = len(unique_texts)
+                unique_texts.append(text)
+            positions[idx] = unique_idx
+
+        # Serve what we can from the caches and only request the rest.
+        cached = self.embedding_cache.get_many(self.embedding_model_name, unique_texts)
+        missing = [idx for idx, embedding in enumerate(cached) if embedding is None]
+        missing_embeddings, missing_failed = self._encode_unique_texts(
+            [unique_texts[idx] for idx in missing], max_workers=max_workers
+        )
+        dim = next(
+            (embedding.shape[0] for embedding in cached if embedding is not None),
+            missing_embeddings.shape[1],
+        )
 
-            for future in as_completed(futures):
-                try:
-                    text, embedding, tokens = future.result()
-                    embeddings.append((text, embedding, tokens))
-                    total_tokens += tokens
-                except Exception as e:
-                    print(f"An error occurred for text: {futures[future]}")
-                    print(e)
-
-        # Sort results to match the order of the input texts
-        embeddings.sort(key=lambda x: texts.index(x[0]))
-        embeddings = [result[1] for result in embeddings]
-        self.total_token_usage += total_tokens
-
-        return np.array(embeddings)
+        unique_embeddings = np.zeros((len(unique_texts), dim), dtype=np.float32)
+        unique_failed = np.zeros(len(unique_texts), dtype=bool)
+        for idx, embedding in enumerate(cached):
+            if embedding is not None:
+                unique_embeddings[idx] = embedding
+        if missing_embeddings.shape[1] == dim:
+            unique_embeddings[missing] = missing_embeddings
+            unique_failed[missing] = missing_failed
+        elif missing:
+            print(
+                f"Embeddings of size {missing_embeddings.shape[1]} do not match the cached ones of size {dim}"
+            )
+            unique_failed[missing] = True
+        encoded = [idx for idx in missing if not unique_failed[idx]]
+        self.embedding_cache.put_many(
+            self.embedding_model_name,
+            [unique_texts[idx] for idx in encoded],
+            unique_embeddings[encoded],
+        )
+        return unique_embeddings[positions], unique_failed[positions]
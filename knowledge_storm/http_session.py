@@ -0,0 +1,78 @@
+import threading
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HTTP_POOL_SIZE = 10
+
+_http_session: Optional[requests.Session] = None
+_http_pool_size = 0
+_http_session_lock = threading.Lock()
+
+
+def configure_http_pool(pool_size: int = DEFAULT_HTTP_POOL_SIZE) -> requests.Session:
+    """Make sure the shared HTTP session keeps at least `pool_size` connections per host alive.
+
+    The pool only grows, so every runner can size it to its own `max_thread_num` without shrinking
+    the pool of another runner in the same process.
+
+    Returns:
+        The shared session.
+    """
+    global _http_session, _http_pool_size
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = requests.Session()
+        if pool_size > _http_pool_size:
+            adapter = HTTPAdapter(
+                pool_connections=max(pool_size, DEFAULT_HTTP_POOL_SIZE),
+                pool_maxsize=pool_size,
+            )
+            _http_session.mount("https://", adapter)
+            _http_session.mount("http://", adapter)
+            _http_pool_size = pool_size
+        return _http_session
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide keep-alive `requests.Session` shared by the hand-rolled API clients.
+
+    Reusing it saves a TCP + TLS handshake on every search and completion call. urllib3's connection
+    pools are thread-safe, so the session can be used from the worker threads of a runner directly.
+    """
+    session = _http_session
+    if session is not None:
+        return session
+    return configure_http_pool(DEFAULT_HTTP_POOL_SIZE)
+
+
+def _httpx_client_kwargs(pool_size: int, kwargs: dict) -> dict:
+    kwargs.setdefault("http2", HTTP2_AVAILABLE)
+    kwargs.setdefault(
+        "limits",
+        httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+    )
+    return kwargs
+
+
+def create_httpx_client(
+    pool_size: int = DEFAULT_HTTP_POOL_SIZE, **kwargs
+) -> httpx.Client:
+    """Create a pooled `httpx.Client`, speaking HTTP/2 when the `h2` package is installed."""
+    return httpx.Client(**_httpx_client_kwargs(pool_size, kwargs))
+
+
+def create_async_httpx_client(
+    pool_size: int = DEFAULT_HTTP_POOL_SIZE, **kwargs
+) -> httpx.AsyncClient:
+    """Async counterpart of `create_httpx_client`. The client is bound to the event loop it is used in."""
+    return httpx.AsyncClient(**_httpx_client_kwargs(pool_size, kwargs))
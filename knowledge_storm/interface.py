@@ -4,11 +4,15 @@ import functools
 import hashlib
 import json
 import logging
+import os
+import threading
 import time
+import uuid
 from abc import ABC, abstractmethod
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from typing import Dict, List, Optional, Union, TYPE_CHECKING
 
+from .cache import SQLiteCache, get_search_cache
 from .utils import ArticleTextProcessing
 
 logging.basicConfig(
@@ -266,14 +270,44 @@ class Retriever:
     The retrieval model/search engine used for each part should be declared with a suffix '_rm' in the attribute name.
     """
 
-    def __init__(self, rm: dspy.Retrieve, max_thread: int = 1):
+    def __init__(
+        self,
+        rm: dspy.Retrieve,
+        max_thread: int = 1,
+        search_cache: Union[bool, SQLiteCache] = True,
+    ):
+        """
+        Args:
+            rm (dspy.Retrieve): The search backend.
+            max_thread (int): Maximum number of queries searched in parallel.
+            search_cache (Union[bool, SQLiteCache]): Where to cache search results, keyed by backend,
+                normalized query, excluded URLs and the parameters the backend reports from
+                `search_cache_params()`. Backends without that method are not cached. True uses the
+                cache from `get_search_cache()` (see `configure_search_cache` for its path, TTL and
+                size bound), False disables caching, and an `SQLiteCache` is used as is.
+        """
         self.max_thread = max_thread
         self.rm = rm
+        self.search_cache = search_cache
+        self._cache_stats_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
 
     def collect_and_reset_rm_usage(self):
         combined_usage = []
         if hasattr(getattr(self, "rm"), "get_usage_and_reset"):
             combined_usage.append(getattr(self, "rm").get_usage_and_reset())
+        with self._cache_stats_lock:
+            if self._cache_hits or self._cache_misses:
+                backend = type(self.rm).__name__
+                combined_usage.append(
+                    {
+                        f"{backend}_cache_hits": self._cache_hits,
+                        f"{backend}_cache_misses": self._cache_misses,
+                    }
+                )
+            self._cache_hits = 0
+            self._cache_misses = 0
 
         name_to_usage = {}
         for usage in combined_usage:
@@ -285,6 +319,47 @@ class Retriever:
 
         return name_to_usage
 
+    def _get_search_cache(self) -> Optional[SQLiteCache]:
+        if self.search_cache is True:
+            return get_search_cache()
+        return self.search_cache or None
+
+    def _search_cache_key(self, query: str, exclude_urls: List[str]) -> Optional[str]:
+        # Only the parameters a backend declares are keyed on, as its other attributes change at
+        # runtime (usage counters, lazily set URLs) without changing the results.
+        search_cache_params = getattr(self.rm, "search_cache_params", None)
+        if search_cache_params is None:
+            return None
+        return json.dumps(
+            {
+                "query": " ".join(query.lower().split()),
+                "params": search_cache_params(),
+                "exclude_urls": sorted(exclude_urls),
+            },
+            sort_keys=True,
+            default=str,
+        )
+
+    def _search(self, query: str, exclude_urls: List[str]) -> List[Dict]:
+        search_cache = self._get_search_cache()
+        key = self._search_cache_key(query, exclude_urls)
+        if search_cache is None or key is None:
+            return self.rm(query_or_queries=[query], exclude_urls=exclude_urls)
+
+        backend = type(self.rm).__name__
+        results = search_cache.get(backend, key)
+        with self._cache_stats_lock:
+            if results is None:
+                self._cache_misses += 1
+            else:
+                self._cache_hits += 1
+        if results is None:
+            results = self.rm(query_or_queries=[query], exclude_urls=exclude_urls)
+            # Backends return no results when the request failed, which must not be cached.
+            if results:
+                search_cache.put(backend, key, results)
+        return results
+
     def retrieve(
         self, query: Union[str, List[str]], exclude_urls: List[str] = []
     ) -> List[Information]:
@@ -292,9 +367,7 @@ class Retriever:
         to_return = []
 
         def process_query(q):
-            retrieved_data_list = self.rm(
-                query_or_queries=[q], exclude_urls=exclude_urls
-            )
+            retrieved_data_list = self._search(q, exclude_urls)
             local_to_return = []
             for data in retrieved_data_list:
                 for i in range(len(data["snippets"])):
@@ -424,12 +497,149 @@ def log_execution_time(func):
     return wrapper
 
 
+class LMHistory(list):
+    """Bounded drop-in replacement for the `history` list of a language model wrapper.
+
+    At most `max_entries` entries and `max_bytes` (JSON-serialized size) are kept in memory; the
+    oldest entries are dropped first and counted in `num_dropped`. If `sink_path` is given, every
+    entry is also appended to that JSONL file when it is recorded, so the full history survives
+    eviction and can be streamed out with `drain_to` without loading it back into memory. The sink
+    is truncated when the history is created, so it never holds lines from an earlier run.
+    """
+
+    def __init__(
+        self,
+        entries=(),
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sink_path: Optional[str] = None,
+    ):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sink_path = sink_path
+        self.num_dropped = 0
+        self._lock = threading.Lock()
+        self._entry_sizes = deque()
+        self._num_bytes = 0
+        if sink_path:
+            if os.path.dirname(sink_path):
+                os.makedirs(os.path.dirname(sink_path), exist_ok=True)
+            open(sink_path, "w").close()
+        self.extend(entries)
+
+    def __reduce__(self):
+        # Restore entries and counters as-is instead of re-appending them (and re-writing the sink).
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return self.__class__._from_state, (list(self), state)
+
+    @classmethod
+    def _from_state(cls, entries, state):
+        history = cls.__new__(cls)
+        list.extend(history, entries)
+        history.__dict__.update(state)
+        history._lock = threading.Lock()
+        return history
+
+    def append(self, entry):
+        line = (
+            json.dumps(entry, default=str) if self.sink_path or self.max_bytes else None
+        )
+        with self._lock:
+            if self.sink_path:
+                with open(self.sink_path, "a") as f:
+                    f.write(line + "\n")
+            super().append(entry)
+            size = len(line) if line is not None else 0
+            self._entry_sizes.append(size)
+            self._num_bytes += size
+            self._evict()
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def _evict(self):
+        num_evicted = 0
+        while len(self) - num_evicted > 1 and (
+            (
+                self.max_entries is not None
+                and len(self) - num_evicted > self.max_entries
+            )
+            or (self.max_bytes is not None and self._num_bytes > self.max_bytes)
+        ):
+            self._num_bytes -= self._entry_sizes.popleft()
+            num_evicted += 1
+        if num_evicted:
+            del self[:num_evicted]
+            self.num_dropped += num_evicted
+
+    def _reset(self) -> Optional[str]:
+        """Clear the in-memory entries and detach the sink file, returning the detached file path."""
+        del self[:]
+        self._entry_sizes.clear()
+        self._num_bytes = 0
+        self.num_dropped = 0
+        if self.sink_path is None or not os.path.exists(self.sink_path):
+            return None
+        detached_path = f"{self.sink_path}.{time.time_ns()}.draining"
+        os.replace(self.sink_path, detached_path)
+        return detached_path
+
+    def drain(self) -> list:
+        """Return every recorded entry (read back from the sink if there is one) and reset the history."""
+        with self._lock:
+            entries = list(self)
+            detached_path = self._reset()
+        if detached_path is None:
+            return entries
+        with open(detached_path) as f:
+            entries = [json.loads(line) for line in f]
+        os.remove(detached_path)
+        return entries
+
+    def drain_to(self, f, exclude_keys=()) -> int:
+        """Stream every recorded entry as JSON lines to the file object `f` and reset the history.
+
+        Returns:
+            The number of entries written.
+        """
+        with self._lock:
+            entries = list(self)
+            detached_path = self._reset()
+        if detached_path is not None:
+            with open(detached_path) as sink:
+                entries = (json.loads(line) for line in sink)
+                num_written = self._write_entries(f, entries, exclude_keys)
+            os.remove(detached_path)
+            return num_written
+        return self._write_entries(f, entries, exclude_keys)
+
+    @staticmethod
+    def _write_entries(f, entries, exclude_keys) -> int:
+        num_written = 0
+        for entry in entries:
+            for key in exclude_keys:
+                entry.pop(key, None)
+            f.write(json.dumps(entry, default=str) + "\n")
+            num_written += 1
+        return num_written
+
+
 class LMConfigs(ABC):
     """Abstract base class for language model configurations of the knowledge curation engine.
 
     The language model used for each part should be declared with a suffix '_lm' in the attribute name.
     """
 
+    # Set by `set_lm_history_policy()`; applied to every language model set afterwards.
+    _history_policy = None
+
     def __init__(self):
         pass
 
@@ -440,15 +650,103 @@ class LMConfigs(ABC):
                     f"Language model for {attr_name} is not initialized. Please call set_{attr_name}()"
                 )
 
+    def _lms_with_history(self):
+        lms = {}
+        for attr_name in self.__dict__:
+            lm = getattr(self, attr_name)
+            if "_lm" in attr_name and hasattr(lm, "history") and id(lm) not in lms:
+                lms[id(lm)] = (attr_name, lm)
+        return list(lms.values())
+
+    def set_lm_history_policy(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sink_dir: Optional[str] = None,
+    ):
+        """Bound the call history kept in memory by every language model of this configuration.
+
+        The policy is applied to the language models set so far and remembered, so language models
+        set afterwards (e.g., through `set_*_lm()`) are bounded as well.
+
+        Args:
+            max_entries: Maximum number of calls kept in memory per language model.
+            max_bytes: Maximum JSON-serialized size of the calls kept in memory per language model.
+            sink_dir: If given, every call is also streamed to `<sink_dir>/<attr_name>.<id>.jsonl`,
+                and `collect_and_reset_lm_history` / `dump_and_reset_lm_history` read the full
+                history from there instead of from memory. The id is unique per call, so configs
+                sharing a `sink_dir` do not mix their histories.
+        """
+        self._history_policy = {
+            "max_entries": max_entries,
+            "max_bytes": max_bytes,
+            "sink_dir": sink_dir,
+        }
+        for attr_name, lm in self._lms_with_history():
+            self._apply_lm_history_policy(attr_name, lm)
+
+    def _apply_lm_history_policy(self, attr_name, lm):
+        sink_dir = self._history_policy["sink_dir"]
+        sink_path = (
+            os.path.join(sink_dir, f"{attr_name}.{uuid.uuid4().hex}.jsonl")
+            if sink_dir
+            else None
+        )
+        # Carry over the full history, including entries only kept in a previous sink.
+        history = (
+            lm.history.drain() if isinstance(lm.history, LMHistory) else lm.history
+        )
+        lm.history = LMHistory(
+            history,
+            max_entries=self._history_policy["max_entries"],
+            max_bytes=self._history_policy["max_bytes"],
+            sink_path=sink_path,
+        )
+
+    def __setattr__(self, name, value):
+        already_set = any(
+            lm is value
+            for attr_name, lm in self.__dict__.items()
+            if "_lm" in attr_name and attr_name != name
+        )
+        super().__setattr__(name, value)
+        if (
+            self._history_policy is not None
+            and "_lm" in name
+            and hasattr(value, "history")
+            and not already_set
+        ):
+            self._apply_lm_history_policy(name, value)
+
     def collect_and_reset_lm_history(self):
         history = []
-        for attr_name in self.__dict__:
-            if "_lm" in attr_name and hasattr(getattr(self, attr_name), "history"):
-                history.extend(getattr(self, attr_name).history)
-                getattr(self, attr_name).history = []
+        for _, lm in self._lms_with_history():
+            if isinstance(lm.history, LMHistory):
+                history.extend(lm.history.drain())
+            else:
+                history.extend(lm.history)
+                lm.history = []
 
         return history
 
+    def dump_and_reset_lm_history(self, file_path: str, exclude_keys=()) -> int:
+        """Write the call history of every language model to a JSONL file and reset it.
+
+        Histories backed by a sink are streamed from disk rather than collected in memory first.
+
+        Returns:
+            The number of calls written.
+        """
+        num_written = 0
+        with open(file_path, "w") as f:
+            for _, lm in self._lms_with_history():
+                if isinstance(lm.history, LMHistory):
+                    num_written += lm.history.drain_to(f, exclude_keys=exclude_keys)
+                else:
+                    num_written += LMHistory._write_entries(f, lm.history, exclude_keys)
+                    lm.history = []
+        return num_written
+
     def collect_and_reset_lm_usage(self):
         combined_usage = []
         for attr_name in self.__dict__:
@@ -463,12 +761,10 @@ class LMConfigs(ABC):
                 if model_name not in model_name_to_usage:
                     model_name_to_usage[model_name] = tokens
                 else:
-                    model_name_to_usage[model_name]["prompt_tokens"] += tokens[
-                        "prompt_tokens"
-                    ]
-                    model_name_to_usage[model_name]["completion_tokens"] += tokens[
-                        "completion_tokens"
-                    ]
+                    for key, count in tokens.items():
+                        model_name_to_usage[model_name][key] = (
+                            model_name_to_usage[model_name].get(key, 0) + count
+                        )
 
         return model_name_to_usage
 
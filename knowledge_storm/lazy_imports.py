@@ -0,0 +1,40 @@
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    package: str, exports: Dict[str, List[str]]
+) -> Tuple[Callable, Callable, List[str]]:
+    """
+    Builds the module-level `__getattr__`, `__dir__` and `__all__` of a package whose public names
+    are imported from their submodules on first access (PEP 562).
+
+    This keeps `import knowledge_storm` cheap: a script that only uses `STORMWikiRunner` and
+    `BingSearch` does not pay for importing every language model client, retriever and embedding
+    stack up front.
+
+    Args:
+        package: `__name__` of the package.
+        exports: Maps each submodule, relative to `package`, to the public names it defines.
+
+    Returns:
+        The `__getattr__` and `__dir__` functions and the `__all__` list of the package.
+    """
+    name_to_submodule = {
+        name: submodule for submodule, names in exports.items() for name in names
+    }
+
+    def __getattr__(name: str):
+        submodule = name_to_submodule.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(submodule, package), name)
+        # Cache on the package so that later lookups skip `__getattr__`.
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(name_to_submodule))
+
+    return __getattr__, __dir__, list(name_to_submodule)
@@ -1,21 +1,25 @@
+import asyncio
 import backoff
 import dspy
 import functools
+import hashlib
 import logging
 import os
 import random
-import requests
 import threading
-from typing import Optional, Literal, Any
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Literal, Any, Tuple, Union
 import ujson
-from pathlib import Path
 
 
 from dsp import ERRORS, backoff_hdlr, giveup_hdlr
 from dsp.modules.hf import openai_to_hf
 from dsp.modules.hf_client import send_hftgi_request_v01_wrapped
-from openai import OpenAI, AzureOpenAI
-from transformers import AutoTokenizer
+
+from .cache import get_response_cache
+from .http_session import get_http_session
 
 try:
     from anthropic import RateLimitError
@@ -37,11 +41,6 @@ with warnings.catch_warnings():
     litellm.drop_params = True
     litellm.telemetry = False
 
-from litellm.caching.caching import Cache
-
-disk_cache_dir = os.path.join(Path.home(), ".storm_local_cache")
-litellm.cache = Cache(disk_cache_dir=disk_cache_dir, type="disk")
-
 # except ImportError:
 
 #     class LitellmPlaceholder:
@@ -53,6 +52,299 @@ litellm.cache = Cache(disk_cache_dir=disk_cache_dir, type="disk")
 # litellm = LitellmPlaceholder()
 LM_LRU_CACHE_MAX_SIZE = 3000
 
+# dspy's `Template` joins the instructions, the format guidelines, the demos and the current example
+# with this separator, so everything up to its last occurrence is the same for every call of a
+# signature.
+_DSPY_PROMPT_SEPARATOR = "\n\n---\n\n"
+
+
+class TokenBucketRateLimiter:
+    """Proactive requests-per-minute / tokens-per-minute limiter.
+
+    Both budgets are token buckets that start full and refill continuously, so bursts up to the
+    per-minute budget go through immediately and sustained traffic is paced instead of running into
+    429 responses. A request estimated at more tokens than the whole TPM budget is admitted once the
+    bucket is full and the overdraft is paid back by later requests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._request_allowance = float(requests_per_minute or 0)
+        self._token_allowance = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._queue_depth = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._num_requests = 0
+        self._num_throttled = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._max_queue_depth = self._queue_depth
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_allowance = min(
+                self.requests_per_minute,
+                self._request_allowance + elapsed * self.requests_per_minute / 60,
+            )
+        if self.tokens_per_minute:
+            self._token_allowance = min(
+                self.tokens_per_minute,
+                self._token_allowance + elapsed * self.tokens_per_minute / 60,
+            )
+
+    def _poll(self, num_tokens: int, waiting: bool) -> float:
+        """Take the budget for one request if it is available, otherwise return the seconds to wait."""
+        with self._lock:
+            self._refill()
+            delay = 0.0
+            if self.requests_per_minute and self._request_allowance < 1:
+                delay = (1 - self._request_allowance) * 60 / self.requests_per_minute
+            if self.tokens_per_minute:
+                needed = min(num_tokens, self.tokens_per_minute)
+                if self._token_allowance < needed:
+                    delay = max(
+                        delay,
+                        (needed - self._token_allowance) * 60 / self.tokens_per_minute,
+                    )
+            if delay > 0:
+                if not waiting:
+                    self._queue_depth += 1
+                    self._max_queue_depth = max(
+                        self._max_queue_depth, self._queue_depth
+                    )
+                return delay
+            if self.requests_per_minute:
+                self._request_allowance -= 1
+            if self.tokens_per_minute:
+                self._token_allowance -= num_tokens
+            return 0.0
+
+    def _finish(self, start: float, waiting: bool, granted: bool) -> float:
+        waited = time.monotonic() - start
+        with self._lock:
+            if waiting:
+                self._queue_depth -= 1
+            if granted:
+                self._num_requests += 1
+                self._num_throttled += int(waiting)
+                self._total_wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+        return waited
+
+    def acquire(self, num_tokens: int = 0) -> float:
+        """Block until one request of `num_tokens` estimated tokens fits both budgets.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        start = time.monotonic()
+        waiting = granted = False
+        try:
+            delay = self._poll(num_tokens, waiting)
+            while delay > 0:
+                waiting = True
+                time.sleep(delay)
+                delay = self._poll(num_tokens, waiting)
+            granted = True
+        finally:
+            waited = self._finish(start, waiting, granted)
+        return waited
+
+    async def aacquire(self, num_tokens: int = 0) -> float:
+        """Awaitable counterpart of `acquire` that does not block the event loop."""
+        start = time.monotonic()
+        waiting = granted = False
+        try:
+            delay = self._poll(num_tokens, waiting)
+            while delay > 0:
+                waiting = True
+                await asyncio.sleep(delay)
+                delay = self._poll(num_tokens, waiting)
+            granted = True
+        finally:
+            waited = self._finish(start, waiting, granted)
+        return waited
+
+    def get_stats(self, reset: bool = False) -> dict:
+        """Return queue depth and wait time metrics, optionally resetting the counters."""
+        with self._lock:
+            stats = {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "num_requests": self._num_requests,
+                "num_throttled": self._num_throttled,
+                "queue_depth": self._queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "total_wait_time": self._total_wait_time,
+                "max_wait_time": self._max_wait_time,
+                "avg_wait_time": (
+                    self._total_wait_time / self._num_requests
+                    if self._num_requests
+                    else 0.0
+                ),
+            }
+            if reset:
+                self._reset_stats()
+        return stats
+
+
+_rate_limiters: dict = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _rate_limiter_key(provider: str, api_key: Optional[str] = None):
+    # Only a fingerprint of the API key is kept so that keys never end up in stats or logs.
+    fingerprint = (
+        hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12] if api_key else None
+    )
+    return provider, fingerprint
+
+
+def configure_rate_limit(
+    provider: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    api_key: Optional[str] = None,
+) -> Optional[TokenBucketRateLimiter]:
+    """Register the limiter shared by every LM instance that calls `provider`.
+
+    Args:
+        provider: Provider name, e.g. "openai", "anthropic", "azure", "deepseek", "groq", "google" or
+            "together". For `LitellmModel` this is the litellm prefix of the model string ("openai"
+            if the model has no prefix).
+        requests_per_minute: Requests-per-minute budget, or None for no request limit.
+        tokens_per_minute: Tokens-per-minute budget (estimated prompt tokens plus `max_tokens`), or
+            None for no token limit.
+        api_key: Restrict the limiter to calls made with this key. Calls with other keys fall back to
+            the provider-wide limiter, if any.
+
+    Returns:
+        The registered limiter, or None if both budgets are None (which removes the limiter).
+    """
+    key = _rate_limiter_key(provider, api_key)
+    with _rate_limiters_lock:
+        if requests_per_minute is None and tokens_per_minute is None:
+            _rate_limiters.pop(key, None)
+            return None
+        limiter = TokenBucketRateLimiter(requests_per_minute, tokens_per_minute)
+        _rate_limiters[key] = limiter
+    return limiter
+
+
+def get_rate_limiter(
+    provider: str, api_key: Optional[str] = None
+) -> Optional[TokenBucketRateLimiter]:
+    with _rate_limiters_lock:
+        return _rate_limiters.get(
+            _rate_limiter_key(provider, api_key)
+        ) or _rate_limiters.get((provider, None))
+
+
+def get_rate_limit_stats(reset: bool = False) -> dict:
+    """Return the metrics of every registered limiter, keyed by provider (and key fingerprint)."""
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {
+        (
+            provider if fingerprint is None else f"{provider}:{fingerprint}"
+        ): limiter.get_stats(reset=reset)
+        for (provider, fingerprint), limiter in limiters.items()
+    }
+
+
+def _estimate_prompt_tokens(prompt=None, messages=None) -> int:
+    """Cheap token estimate (~4 characters per token) used to charge the TPM budget before dispatch."""
+    text_length = len(prompt) if isinstance(prompt, str) else 0
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else message
+        text_length += len(content) if isinstance(content, str) else len(str(content))
+    return text_length // 4 + 1
+
+
+def acquire_rate_limit(
+    provider: str,
+    api_key: Optional[str] = None,
+    prompt=None,
+    messages=None,
+    max_tokens: Optional[int] = None,
+) -> float:
+    """Wait on the shared limiter for `provider`, if one is configured. Returns the seconds waited."""
+    limiter = get_rate_limiter(provider, api_key)
+    if limiter is None:
+        return 0.0
+    return limiter.acquire(
+        _estimate_prompt_tokens(prompt, messages) + (max_tokens or 0)
+    )
+
+
+async def aacquire_rate_limit(
+    provider: str,
+    api_key: Optional[str] = None,
+    prompt=None,
+    messages=None,
+    max_tokens: Optional[int] = None,
+) -> float:
+    """Awaitable counterpart of `acquire_rate_limit`."""
+    limiter = get_rate_limiter(provider, api_key)
+    if limiter is None:
+        return 0.0
+    return await limiter.aacquire(
+        _estimate_prompt_tokens(prompt, messages) + (max_tokens or 0)
+    )
+
+
+def split_static_prompt_prefix(prompt: str) -> Tuple[str, str]:
+    """Splits a dspy prompt into the prefix shared by every call of its signature and the rest."""
+    prefix, separator, suffix = prompt.rpartition(_DSPY_PROMPT_SEPARATOR)
+    if not separator:
+        return "", prompt
+    return prefix + separator, suffix
+
+
+def _cacheable_content(prompt: str) -> Union[str, list]:
+    """
+    Turns a prompt into Anthropic-style content blocks whose static prefix ends in a `cache_control`
+    breakpoint, so the provider serves it from its prompt cache on repeated calls. Prompts without
+    a static prefix are returned unchanged.
+    """
+    prefix, suffix = split_static_prompt_prefix(prompt)
+    if not prefix:
+        return prompt
+    return [
+        {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": suffix},
+    ]
+
+
+def _supports_cache_control(model: str) -> bool:
+    # OpenAI-compatible APIs cache shared prefixes automatically; Claude needs explicit breakpoints.
+    provider = model.split("/", 1)[0] if "/" in model else ""
+    return provider == "anthropic" or (
+        provider in ("bedrock", "vertex_ai") and "claude" in model
+    )
+
+
+def _litellm_rate_limit_args(kwargs: dict) -> dict:
+    model = kwargs.get("model", "")
+    provider = model.split("/", 1)[0] if "/" in model else "openai"
+    return dict(
+        provider=provider,
+        api_key=kwargs.get("api_key") or os.getenv(f"{provider.upper()}_API_KEY"),
+        messages=kwargs.get("messages"),
+        max_tokens=kwargs.get("max_tokens"),
+    )
+
 
 class LM:
     def __init__(
@@ -78,7 +370,7 @@ class LM:
     def __call__(self, prompt=None, messages=None, **kwargs):
         # Build the request.
         cache = kwargs.pop("cache", self.cache)
-        messages = messages or [{"role": "user", "content": prompt}]
+        messages = self._messages(prompt, messages)
         kwargs = {**self.kwargs, **kwargs}
 
         # Make the request and handle LRU & disk caching.
@@ -92,6 +384,70 @@ class LM:
         response = completion(
             ujson.dumps(dict(model=self.model, messages=messages, **kwargs))
         )
+        return self._process_completion(prompt, messages, kwargs, response)
+
+    async def acall(self, prompt=None, messages=None, **kwargs):
+        """Awaitable counterpart of `__call__`, routed through litellm's async completion.
+
+        Uses the same LRU & disk caching, token accounting and history logging as `__call__`.
+        """
+        # Build the request.
+        cache = kwargs.pop("cache", self.cache)
+        messages = self._messages(prompt, messages)
+        kwargs = {**self.kwargs, **kwargs}
+
+        # Make the request and handle LRU & disk caching.
+        if self.model_type == "chat":
+            completion = acached_litellm_completion if cache else alitellm_completion
+        else:
+            completion = (
+                acached_litellm_text_completion if cache else alitellm_text_completion
+            )
+
+        response = await completion(
+            ujson.dumps(dict(model=self.model, messages=messages, **kwargs))
+        )
+        return self._process_completion(prompt, messages, kwargs, response)
+
+    def stream(self, prompt=None, messages=None, **kwargs):
+        """Yields the text of a single completion as the LM generates it.
+
+        The streamed chunks are assembled into one response afterwards, so token accounting, history
+        logging and the persistent response cache behave as in `__call__`; a cached response is
+        yielded as one chunk. Text completion models and `n > 1` fall back to `__call__`.
+        """
+        cache = kwargs.pop("cache", self.cache)
+        messages = self._messages(prompt, messages)
+        kwargs = {**self.kwargs, **kwargs}
+        if self.model_type != "chat" or kwargs.get("n", 1) != 1:
+            yield self(prompt=prompt, messages=messages, cache=cache, **kwargs)[0]
+            return
+
+        request = ujson.dumps(dict(model=self.model, messages=messages, **kwargs))
+        response_cache = get_response_cache() if cache else None
+        response = (
+            response_cache.get("litellm_completion", request)
+            if response_cache is not None
+            else None
+        )
+        if response is not None:
+            yield self._process_completion(prompt, messages, kwargs, response)[0]
+            return
+
+        chunks = []
+        for chunk in litellm_stream_completion(request):
+            chunks.append(chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        response = litellm.stream_chunk_builder(chunks, messages=messages)
+        if response_cache is not None:
+            response_cache.put("litellm_completion", request, response)
+        self._process_completion(prompt, messages, kwargs, response)
+
+    def _messages(self, prompt, messages):
+        return messages or [{"role": "user", "content": prompt}]
+
+    def _process_completion(self, prompt, messages, kwargs, response):
         outputs = [
             c.message.content if hasattr(c, "message") else c["text"]
             for c in response["choices"]
@@ -112,25 +468,279 @@ class LM:
         _inspect_history(self, n)
 
 
+def _async_lru_cache(maxsize):
+    """LRU cache for a coroutine function of one hashable argument.
+
+    `functools.lru_cache` would cache the coroutine object, which can only be awaited once, so this
+    caches the awaited result instead.
+    """
+
+    def decorator(fn):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        async def wrapper(request):
+            with lock:
+                if request in cache:
+                    cache.move_to_end(request)
+                    return cache[request]
+            response = await fn(request)
+            with lock:
+                cache[request] = response
+                cache.move_to_end(request)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return response
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+class _LeaderCancelled(Exception):
+    """Tells the callers waiting on a `SingleFlight` call that the caller making it was cancelled."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call.
+
+    The LRU cache only helps once a call has completed, so parallel threads that issue the identical
+    request at the same moment (e.g. persona or section writers sharing a prompt at temperature 0)
+    would all reach the API. With single-flight, the first caller makes the call and the others wait
+    for its result, or its exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.num_calls = 0
+        self.num_coalesced = 0
+
+    def _join(self, key):
+        """Returns the future of the in-flight call for `key` and whether the caller must make it."""
+        with self._lock:
+            self.num_calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.num_coalesced += 1
+                return future, False
+            future = self._in_flight[key] = Future()
+            # A running future cannot be cancelled, so a cancelled waiter (`wrap_future` cancels the
+            # future it wraps) cannot take the result away from the leader and the other waiters.
+            future.set_running_or_notify_cancel()
+            return future, True
+
+    def _settle(self, key, future, result=None, exception=None):
+        try:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        finally:
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
+
+    def call(self, key, fn):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, exception=e)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def acall(self, key, fn):
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # A concurrent future can be awaited from any event loop or thread.
+                    return await asyncio.wrap_future(future)
+                except _LeaderCancelled:
+                    # The caller that made the call was cancelled, so make it ourselves.
+                    continue
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self._settle(key, future, exception=_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._settle(key, future, exception=e)
+                raise
+            self._settle(key, future, result=result)
+            return result
+
+    def get_stats(self, reset: bool = False) -> dict:
+        """
+        Retrieves the coalescing metrics.
+
+        Args:
+            reset (bool): If True, resets the counters after retrieval.
+
+        Returns:
+            dict: num_calls, num_coalesced (calls served by another caller's in-flight request) and
+                in_flight (requests currently in flight).
+        """
+        with self._lock:
+            stats = {
+                "num_calls": self.num_calls,
+                "num_coalesced": self.num_coalesced,
+                "in_flight": len(self._in_flight),
+            }
+            if reset:
+                self._reset_stats()
+        return stats
+
+
+_single_flights: dict = {}
+
+
+def _single_flight(fn):
+    """Coalesces concurrent calls of a function of one hashable argument."""
+    single_flight = _single_flights.setdefault(fn.__name__, SingleFlight())
+
+    if asyncio.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(request):
+            return await single_flight.acall(request, lambda: fn(request))
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(request):
+        return single_flight.call(request, lambda: fn(request))
+
+    return wrapper
+
+
+def get_coalescing_stats(reset: bool = False) -> dict:
+    """Return the single-flight metrics of the cached litellm completion functions, keyed by function name."""
+    return {
+        name: single_flight.get_stats(reset=reset)
+        for name, single_flight in _single_flights.items()
+    }
+
+
+def _through_response_cache(namespace, request, complete):
+    """Serve `request` from the persistent response cache, calling `complete()` on a miss."""
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return complete()
+    response = response_cache.get(namespace, request)
+    if response is None:
+        response = complete()
+        response_cache.put(namespace, request, response)
+    return response
+
+
+async def _athrough_response_cache(namespace, request, complete):
+    # SQLite calls can block on another writer's lock, so they run off the event loop.
+    response_cache = await asyncio.to_thread(get_response_cache)
+    if response_cache is None:
+        return await complete()
+    response = await asyncio.to_thread(response_cache.get, namespace, request)
+    if response is None:
+        response = await complete()
+        await asyncio.to_thread(response_cache.put, namespace, request, response)
+    return response
+
+
 @functools.lru_cache(maxsize=LM_LRU_CACHE_MAX_SIZE)
+@_single_flight
 def cached_litellm_completion(request):
-    return litellm_completion(request, cache={"no-cache": False, "no-store": False})
+    return _through_response_cache(
+        "litellm_completion",
+        request,
+        lambda: litellm_completion(
+            request, cache={"no-cache": False, "no-store": False}
+        ),
+    )
 
 
 def litellm_completion(request, cache={"no-cache": True, "no-store": True}):
     kwargs = ujson.loads(request)
+    acquire_rate_limit(**_litellm_rate_limit_args(kwargs))
     return litellm.completion(cache=cache, **kwargs)
 
 
+def litellm_stream_completion(request):
+    kwargs = ujson.loads(request)
+    acquire_rate_limit(**_litellm_rate_limit_args(kwargs))
+    return litellm.completion(
+        stream=True, cache={"no-cache": True, "no-store": True}, **kwargs
+    )
+
+
+@_async_lru_cache(maxsize=LM_LRU_CACHE_MAX_SIZE)
+@_single_flight
+async def acached_litellm_completion(request):
+    return await _athrough_response_cache(
+        "litellm_completion",
+        request,
+        lambda: alitellm_completion(
+            request, cache={"no-cache": False, "no-store": False}
+        ),
+    )
+
+
+async def alitellm_completion(request, cache={"no-cache": True, "no-store": True}):
+    kwargs = ujson.loads(request)
+    await aacquire_rate_limit(**_litellm_rate_limit_args(kwargs))
+    return await litellm.acompletion(cache=cache, **kwargs)
+
+
 @functools.lru_cache(maxsize=LM_LRU_CACHE_MAX_SIZE)
+@_single_flight
 def cached_litellm_text_completion(request):
-    return litellm_text_completion(
-        request, cache={"no-cache": False, "no-store": False}
+    return _through_response_cache(
+        "litellm_text_completion",
+        request,
+        lambda: litellm_text_completion(
+            request, cache={"no-cache": False, "no-store": False}
+        ),
     )
 
 
 def litellm_text_completion(request, cache={"no-cache": True, "no-store": True}):
     kwargs = ujson.loads(request)
+    acquire_rate_limit(**_litellm_rate_limit_args(kwargs))
+    return litellm.text_completion(**_build_text_completion_kwargs(kwargs, cache))
+
+
+@_async_lru_cache(maxsize=LM_LRU_CACHE_MAX_SIZE)
+@_single_flight
+async def acached_litellm_text_completion(request):
+    return await _athrough_response_cache(
+        "litellm_text_completion",
+        request,
+        lambda: alitellm_text_completion(
+            request, cache={"no-cache": False, "no-store": False}
+        ),
+    )
+
+
+async def alitellm_text_completion(request, cache={"no-cache": True, "no-store": True}):
+    kwargs = ujson.loads(request)
+    await aacquire_rate_limit(**_litellm_rate_limit_args(kwargs))
+    return await litellm.atext_completion(
+        **_build_text_completion_kwargs(kwargs, cache)
+    )
+
+
+def _build_text_completion_kwargs(kwargs, cache):
 
     # Extract the provider and model from the model string.
     model = kwargs.pop("model").split("/", 1)
@@ -145,7 +755,7 @@ def litellm_text_completion(request, cache={"no-cache": True, "no-store": True})
         [x["content"] for x in kwargs.pop("messages")] + ["BEGIN RESPONSE:"]
     )
 
-    return litellm.text_completion(
+    return dict(
         cache=cache,
         model=f"text-completion-openai/{model}",
         api_key=api_key,
@@ -155,6 +765,18 @@ def litellm_text_completion(request, cache={"no-cache": True, "no-store": True})
     )
 
 
+def _request_samples(request, prompt: str, n: int, **kwargs) -> list:
+    """Issue `n` identical requests concurrently and return the responses in order.
+
+    For providers without a native `n` parameter; the shared rate limiter still bounds the requests.
+    """
+    if n <= 1:
+        return [request(prompt, **kwargs)]
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        futures = [executor.submit(request, prompt, **kwargs) for _ in range(n)]
+        return [future.result() for future in futures]
+
+
 def _green(text: str, end: str = "\n"):
     return "\x1b[32m" + str(text).lstrip() + "\x1b[0m" + end
 
@@ -172,8 +794,11 @@ def _inspect_history(lm, n: int = 1):
 
         print("\n\n\n")
         for msg in messages:
+            content = msg["content"]
+            if isinstance(content, list):
+                content = "".join(block["text"] for block in content)
             print(_red(f"{msg['role'].capitalize()} message:"))
-            print(msg["content"].strip())
+            print(content.strip())
             print("\n")
 
         print(_red("Response:"))
@@ -200,20 +825,45 @@ class LitellmModel(LM):
         model: str = "openai/gpt-4o-mini",
         api_key: Optional[str] = None,
         model_type: Literal["chat", "text"] = "chat",
+        prompt_caching: bool = True,
         **kwargs,
     ):
+        """
+        Args:
+            prompt_caching (bool): Mark the static prefix of dspy prompts (instructions, format
+                guidelines and demos) as cacheable for providers that take explicit prompt caching
+                breakpoints (Anthropic, including via Bedrock and Vertex AI). OpenAI-compatible
+                providers cache shared prefixes automatically. Cached prompt tokens are reported by
+                `get_usage_and_reset` either way.
+        """
         super().__init__(model=model, api_key=api_key, model_type=model_type, **kwargs)
+        self.prompt_caching = prompt_caching
         self._token_usage_lock = threading.Lock()
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    def _messages(self, prompt, messages):
+        if (
+            messages
+            or not self.prompt_caching
+            or self.model_type != "chat"
+            or not _supports_cache_control(self.model)
+        ):
+            return super()._messages(prompt, messages)
+        return [{"role": "user", "content": _cacheable_content(prompt)}]
 
     def log_usage(self, response):
         """Log the total tokens from the OpenAI API response."""
         usage_data = response.get("usage")
         if usage_data:
+            prompt_tokens_details = usage_data.get("prompt_tokens_details") or {}
             with self._token_usage_lock:
                 self.prompt_tokens += usage_data.get("prompt_tokens", 0)
                 self.completion_tokens += usage_data.get("completion_tokens", 0)
+                self.cached_prompt_tokens += (
+                    prompt_tokens_details.get("cached_tokens") or 0
+                )
 
     def get_usage_and_reset(self):
         """Get the total tokens used and reset the token usage."""
@@ -223,30 +873,16 @@ class LitellmModel(LM):
             or self.kwargs.get("engine"): {
                 "prompt_tokens": self.prompt_tokens,
                 "completion_tokens": self.completion_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
             }
         }
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
 
         return usage
 
-    def __call__(self, prompt=None, messages=None, **kwargs):
-        # Build the request.
-        cache = kwargs.pop("cache", self.cache)
-        messages = messages or [{"role": "user", "content": prompt}]
-        kwargs = {**self.kwargs, **kwargs}
-
-        # Make the request and handle LRU & disk caching.
-        if self.model_type == "chat":
-            completion = cached_litellm_completion if cache else litellm_completion
-        else:
-            completion = (
-                cached_litellm_text_completion if cache else litellm_text_completion
-            )
-
-        response = completion(
-            ujson.dumps(dict(model=self.model, messages=messages, **kwargs))
-        )
+    def _process_completion(self, prompt, messages, kwargs, response):
         response_dict = response.json()
         self.log_usage(response_dict)
         outputs = [
@@ -284,6 +920,7 @@ class OpenAIModel(dspy.OpenAI):
         **kwargs,
     ):
         super().__init__(model=model, api_key=api_key, model_type=model_type, **kwargs)
+        self._api_key = api_key or os.getenv("OPENAI_API_KEY")
         self._token_usage_lock = threading.Lock()
         self.prompt_tokens = 0
         self.completion_tokens = 0
@@ -310,6 +947,15 @@ class OpenAIModel(dspy.OpenAI):
 
         return usage
 
+    def basic_request(self, prompt: str, **kwargs):
+        acquire_rate_limit(
+            self.provider,
+            self._api_key,
+            prompt=prompt,
+            max_tokens=kwargs.get("max_tokens", self.kwargs.get("max_tokens")),
+        )
+        return super().basic_request(prompt, **kwargs)
+
     def __call__(
         self,
         prompt: str,
@@ -414,6 +1060,9 @@ class DeepSeekModel(dspy.OpenAI):
     )
     def _create_completion(self, prompt: str, **kwargs):
         """Create a completion using the DeepSeek API."""
+        acquire_rate_limit(
+            "deepseek", self.api_key, prompt=prompt, max_tokens=kwargs.get("max_tokens")
+        )
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
@@ -423,7 +1072,7 @@ class DeepSeekModel(dspy.OpenAI):
             "messages": [{"role": "user", "content": prompt}],
             **kwargs,
         }
-        response = requests.post(
+        response = get_http_session().post(
             f"{self.api_base}/v1/chat/completions", headers=headers, json=data
         )
         response.raise_for_status()
@@ -481,6 +1130,8 @@ class AzureOpenAIModel(dspy.LM):
         self.provider = "azure"
         self.model_type = model_type
 
+        from openai import AzureOpenAI
+
         self.client = AzureOpenAI(
             azure_endpoint=azure_endpoint,
             api_key=api_key,
@@ -509,6 +1160,12 @@ class AzureOpenAIModel(dspy.LM):
     )
     def basic_request(self, prompt: str, **kwargs) -> Any:
         kwargs = {**self.kwargs, **kwargs}
+        acquire_rate_limit(
+            self.provider,
+            self.client.api_key,
+            prompt=prompt,
+            max_tokens=kwargs.get("max_tokens"),
+        )
 
         try:
             if self.model_type == "chat":
@@ -666,12 +1323,15 @@ class GroqModel(dspy.OpenAI):
             "messages": [{"role": "user", "content": prompt}],
             **kwargs,
         }
+        acquire_rate_limit(
+            "groq", self.api_key, prompt=prompt, max_tokens=kwargs.get("max_tokens")
+        )
 
         # Remove 'name' field from messages if present
         for message in data["messages"]:
             message.pop("name", None)
 
-        response = requests.post(
+        response = get_http_session().post(
             f"{self.api_base}/chat/completions", headers=headers, json=data
         )
         response.raise_for_status()
@@ -714,8 +1374,15 @@ class ClaudeModel(dspy.dsp.modules.lm.LM):
         model: str,
         api_key: Optional[str] = None,
         api_base: Optional[str] = None,
+        prompt_caching: bool = True,
         **kwargs,
     ):
+        """
+        Args:
+            prompt_caching (bool): Mark the static prefix of dspy prompts (instructions, format
+                guidelines and demos) as cacheable, so repeated calls of a signature read it from
+                Anthropic's prompt cache.
+        """
         super().__init__(model)
         try:
             from anthropic import Anthropic
@@ -741,18 +1408,30 @@ class ClaudeModel(dspy.dsp.modules.lm.LM):
         self.history: list[dict[str, Any]] = []
         self.client = Anthropic(api_key=api_key)
         self.model = model
+        self.prompt_caching = prompt_caching
 
         self._token_usage_lock = threading.Lock()
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
 
     def log_usage(self, response):
         """Log the total tokens from the Anthropic API response."""
         usage_data = response.usage
         if usage_data:
+            # `input_tokens` only counts the tokens after the last cache breakpoint.
+            cache_read_tokens = (
+                getattr(usage_data, "cache_read_input_tokens", None) or 0
+            )
+            cache_creation_tokens = (
+                getattr(usage_data, "cache_creation_input_tokens", None) or 0
+            )
             with self._token_usage_lock:
-                self.prompt_tokens += usage_data.input_tokens
+                self.prompt_tokens += (
+                    usage_data.input_tokens + cache_read_tokens + cache_creation_tokens
+                )
                 self.completion_tokens += usage_data.output_tokens
+                self.cached_prompt_tokens += cache_read_tokens
 
     def get_usage_and_reset(self):
         """Get the total tokens used and reset the token usage."""
@@ -760,10 +1439,12 @@ class ClaudeModel(dspy.dsp.modules.lm.LM):
             self.model: {
                 "prompt_tokens": self.prompt_tokens,
                 "completion_tokens": self.completion_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
             }
         }
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
 
         return usage
 
@@ -771,16 +1452,50 @@ class ClaudeModel(dspy.dsp.modules.lm.LM):
         raw_kwargs = kwargs
         kwargs = {**self.kwargs, **kwargs}
         # caching mechanism requires hashable kwargs
-        kwargs["messages"] = [{"role": "user", "content": prompt}]
+        kwargs["messages"] = self._messages(prompt)
         kwargs.pop("n")
+        acquire_rate_limit(
+            self.provider,
+            self.api_key,
+            prompt=prompt,
+            max_tokens=kwargs.get("max_tokens"),
+        )
         response = self.client.messages.create(**kwargs)
+        self.history.append(self._history_entry(prompt, response, kwargs, raw_kwargs))
+        return response
+
+    def stream(self, prompt: str, **kwargs):
+        """Yields the completion text as Claude generates it, then logs usage and history."""
+        raw_kwargs = kwargs
+        kwargs = {**self.kwargs, **kwargs}
+        kwargs["messages"] = self._messages(prompt)
+        kwargs.pop("n")
+        acquire_rate_limit(
+            self.provider,
+            self.api_key,
+            prompt=prompt,
+            max_tokens=kwargs.get("max_tokens"),
+        )
+        with self.client.messages.stream(**kwargs) as stream:
+            for text in stream.text_stream:
+                yield text
+            response = stream.get_final_message()
+        self.log_usage(response)
+        self.history.append(self._history_entry(prompt, response, kwargs, raw_kwargs))
+
+    def _messages(self, prompt: str):
+        content = _cacheable_content(prompt) if self.prompt_caching else prompt
+        return [{"role": "user", "content": content}]
+
+    @staticmethod
+    def _history_entry(prompt, response, kwargs, raw_kwargs):
         # history = {
         #     "prompt": prompt,
         #     "response": response,
         #     "kwargs": kwargs,
         #     "raw_kwargs": raw_kwargs,
         # }
-        json_serializable_history = {
+        return {
             "prompt": prompt,
             "response": {
                 "content": response.content[0].text,
@@ -792,13 +1507,14 @@ class ClaudeModel(dspy.dsp.modules.lm.LM):
                 "usage": {
                     "input_tokens": response.usage.input_tokens,
                     "output_tokens": response.usage.output_tokens,
+                    "cache_read_input_tokens": getattr(
+                        response.usage, "cache_read_input_tokens", None
+                    ),
                 },
             },
             "kwargs": kwargs,
             "raw_kwargs": raw_kwargs,
         }
-        self.history.append(json_serializable_history)
-        return response
 
     @backoff.on_exception(
         backoff.expo,
@@ -830,15 +1546,14 @@ class ClaudeModel(dspy.dsp.modules.lm.LM):
         # so this cannot be a proper indicator for incomplete response unless it isnt the user-intent.
         n = kwargs.pop("n", 1)
         completions = []
-        for _ in range(n):
-            response = self.request(prompt, **kwargs)
+        for response in _request_samples(self.request, prompt, n, **kwargs):
             self.log_usage(response)
             # This is the original behavior in dspy/dsp/modules/anthropic.py.
             # Comment it out because it can cause "IndexError: list index out of range" silently
             # which is not transparent to developers.
             # if only_completed and response.stop_reason == "max_tokens":
             #     continue
-            completions = [c.text for c in response.content]
+            completions.extend(c.text for c in response.content)
         return completions
 
 
@@ -865,6 +1580,8 @@ class VLLMClient(dspy.dsp.LM):
         self.base_url = f"{url}:{port}/v1/"
         if model_type == "chat":
             self.base_url += "chat/"
+        from openai import OpenAI
+
         self.client = OpenAI(base_url=self.base_url, api_key=api_key)
         self.prompt_tokens = 0
         self.completion_tokens = 0
@@ -1022,7 +1739,7 @@ class TogetherClient(dspy.HFModel):
         """Copied from dspy/dsp/modules/hf_client.py with the support of applying tokenizer chat template."""
 
         super().__init__(model=model, is_client=True)
-        self.session = requests.Session()
+        self.session = get_http_session()
         self.api_key = api_key = (
             os.environ.get("TOGETHER_API_KEY") if api_key is None else api_key
         )
@@ -1041,6 +1758,8 @@ class TogetherClient(dspy.HFModel):
         #     self.use_inst_template = True
         self.apply_tokenizer_chat_template = apply_tokenizer_chat_template
         if self.apply_tokenizer_chat_template:
+            from transformers import AutoTokenizer
+
             logging.info("Loading huggingface tokenizer.")
             if hf_tokenizer_name is None:
                 hf_tokenizer_name = self.model
@@ -1137,6 +1856,9 @@ class TogetherClient(dspy.HFModel):
             }
 
         headers = {"Authorization": f"Bearer {self.api_key}"}
+        acquire_rate_limit(
+            "together", self.api_key, prompt=prompt, max_tokens=max_tokens
+        )
 
         with self.session.post(self.api_base, headers=headers, json=body) as resp:
             resp_json = resp.json()
@@ -1176,6 +1898,7 @@ class GoogleModel(dspy.dsp.modules.lm.LM):
 
         api_key = os.environ.get("GOOGLE_API_KEY") if api_key is None else api_key
         genai.configure(api_key=api_key)
+        self.api_key = api_key
 
         kwargs = {
             "candidate_count": 1,  # Caveat: Gemini API supports only one candidate for now.
@@ -1238,6 +1961,12 @@ class GoogleModel(dspy.dsp.modules.lm.LM):
         # Google disallows "n" arguments.
         n = kwargs.pop("n", None)
 
+        acquire_rate_limit(
+            "google",
+            self.api_key,
+            prompt=prompt,
+            max_tokens=kwargs.get("max_output_tokens"),
+        )
         response = self.llm.generate_content(prompt, generation_config=kwargs)
 
         history = {
@@ -1275,8 +2004,7 @@ class GoogleModel(dspy.dsp.modules.lm.LM):
         n = kwargs.pop("n", 1)
 
         completions = []
-        for _ in range(n):
-            response = self.request(prompt, **kwargs)
+        for response in _request_samples(self.request, prompt, n, **kwargs):
             self.log_usage(response)
             completions.append(response.parts[0].text)
 
@@ -1,18 +1,124 @@
 import logging
 import os
-from typing import Callable, Union, List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Union, List
 
 import backoff
 import dspy
-import requests
 from dsp import backoff_hdlr, giveup_hdlr
 
+from .http_session import get_http_session
 from .utils import WebPageHelper
 
+DEFAULT_MAX_CONCURRENT_QUERIES = 5
+
+
+def _source_filter_id(is_valid_source: Callable) -> str:
+    """Identifies an `is_valid_source` filter in search cache keys by where it is defined."""
+    module = getattr(is_valid_source, "__module__", "")
+    name = getattr(is_valid_source, "__qualname__", type(is_valid_source).__name__)
+    return f"{module}.{name}"
+
+
+def _webpage_helper_params(webpage_helper: WebPageHelper) -> dict:
+    """The `WebPageHelper` settings that change which snippets a search returns."""
+    return {
+        "min_char_count": webpage_helper.min_char_count,
+        "snippet_chunk_size": webpage_helper.snippet_chunk_size,
+    }
+
+
+def search_concurrently(
+    search: Callable[[str], Any], queries: List[str], max_concurrent_queries: int
+) -> List[Any]:
+    """
+    Runs `search` for every query, with at most `max_concurrent_queries` requests in flight.
+
+    Returns:
+        The results in the order of `queries`. A query whose search raises is logged and gets None,
+        so one failing query does not affect the others.
+    """
+
+    def search_or_none(query):
+        try:
+            return search(query)
+        except Exception as e:
+            logging.error(f"Error occurs when searching query {query}: {e}")
+            return None
+
+    if len(queries) <= 1 or max_concurrent_queries <= 1:
+        return [search_or_none(query) for query in queries]
+    with ThreadPoolExecutor(
+        max_workers=min(max_concurrent_queries, len(queries))
+    ) as executor:
+        return list(executor.map(search_or_none, queries))
+
+
+class MicroBatcher:
+    """
+    Groups the items submitted by concurrent callers within a short window into batches.
+
+    The first caller of a window waits `window` seconds for other callers to submit, then runs
+    `process_batch` on everything submitted, at most `max_batch_size` items per call. Every caller
+    gets one future per submitted item.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int,
+        window: float,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = []
+        self._collecting = False
+
+    def submit(self, items: List[Any]) -> List[Future]:
+        futures = [Future() for _ in items]
+        with self._lock:
+            self._pending.extend(zip(items, futures))
+            leader = not self._collecting
+            self._collecting = True
+        if leader:
+            if self.window > 0:
+                time.sleep(self.window)
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._collecting = False
+            for start in range(0, len(pending), self.max_batch_size):
+                self._run(pending[start : start + self.max_batch_size])
+        return futures
+
+    def _run(self, batch):
+        try:
+            results = self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Expected {len(batch)} results from a batch, got {len(results)}."
+                )
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
 
 class YouRM(dspy.Retrieve):
-    def __init__(self, ydc_api_key=None, k=3, is_valid_source: Callable = None):
+    def __init__(
+        self,
+        ydc_api_key=None,
+        k=3,
+        is_valid_source: Callable = None,
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+    ):
         super().__init__(k=k)
+        self.max_concurrent_queries = max_concurrent_queries
         if not ydc_api_key and not os.environ.get("YDC_API_KEY"):
             raise RuntimeError(
                 "You must supply ydc_api_key or set environment variable YDC_API_KEY"
@@ -35,6 +141,9 @@ class YouRM(dspy.Retrieve):
 
         return {"YouRM": usage}
 
+    def search_cache_params(self) -> dict:
+        return {"k": self.k, "is_valid_source": _source_filter_id(self.is_valid_source)}
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -53,23 +162,26 @@ class YouRM(dspy.Retrieve):
             else query_or_queries
         )
         self.usage += len(queries)
+
+        def search(query):
+            headers = {"X-API-Key": self.ydc_api_key}
+            response = get_http_session().get(
+                f"https://api.ydc-index.io/search?query={query}",
+                headers=headers,
+            )
+            results = response.json()
+
+            authoritative_results = []
+            for r in results["hits"]:
+                if self.is_valid_source(r["url"]) and r["url"] not in exclude_urls:
+                    authoritative_results.append(r)
+            return authoritative_results[: self.k]
+
         collected_results = []
-        for query in queries:
-            try:
-                headers = {"X-API-Key": self.ydc_api_key}
-                results = requests.get(
-                    f"https://api.ydc-index.io/search?query={query}",
-                    headers=headers,
-                ).json()
-
-                authoritative_results = []
-                for r in results["hits"]:
-                    if self.is_valid_source(r["url"]) and r["url"] not in exclude_urls:
-                        authoritative_results.append(r)
-                if "hits" in results:
-                    collected_results.extend(authoritative_results[: self.k])
-            except Exception as e:
-                logging.error(f"Error occurs when searching query {query}: {e}")
+        for results in search_concurrently(
+            search, queries, self.max_concurrent_queries
+        ):
+            collected_results.extend(results or [])
 
         return collected_results
 
@@ -85,6 +197,7 @@ class BingSearch(dspy.Retrieve):
         webpage_helper_max_threads=10,
         mkt="en-US",
         language="en",
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
         **kwargs,
     ):
         """
@@ -94,8 +207,10 @@ class BingSearch(dspy.Retrieve):
             webpage_helper_max_threads: Maximum number of threads to use for webpage helper.
             mkt, language, **kwargs: Bing search API parameters.
             - Reference: https://learn.microsoft.com/en-us/bing/search-apis/bing-web-search/reference/query-parameters
+            max_concurrent_queries: Maximum number of queries searched in parallel in one call.
         """
         super().__init__(k=k)
+        self.max_concurrent_queries = max_concurrent_queries
         if not bing_search_api_key and not os.environ.get("BING_SEARCH_API_KEY"):
             raise RuntimeError(
                 "You must supply bing_search_subscription_key or set environment variable BING_SEARCH_API_KEY"
@@ -125,6 +240,15 @@ class BingSearch(dspy.Retrieve):
 
         return {"BingSearch": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "k": self.k,
+            "endpoint": self.endpoint,
+            "params": self.params,
+            "is_valid_source": _source_filter_id(self.is_valid_source),
+            **_webpage_helper_params(self.webpage_helper),
+        }
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -148,21 +272,24 @@ class BingSearch(dspy.Retrieve):
 
         headers = {"Ocp-Apim-Subscription-Key": self.bing_api_key}
 
-        for query in queries:
-            try:
-                results = requests.get(
-                    self.endpoint, headers=headers, params={**self.params, "q": query}
-                ).json()
-
-                for d in results["webPages"]["value"]:
-                    if self.is_valid_source(d["url"]) and d["url"] not in exclude_urls:
-                        url_to_results[d["url"]] = {
-                            "url": d["url"],
-                            "title": d["name"],
-                            "description": d["snippet"],
-                        }
-            except Exception as e:
-                logging.error(f"Error occurs when searching query {query}: {e}")
+        def search(query):
+            response = get_http_session().get(
+                self.endpoint, headers=headers, params={**self.params, "q": query}
+            )
+            query_url_to_results = {}
+            for d in response.json()["webPages"]["value"]:
+                if self.is_valid_source(d["url"]) and d["url"] not in exclude_urls:
+                    query_url_to_results[d["url"]] = {
+                        "url": d["url"],
+                        "title": d["name"],
+                        "description": d["snippet"],
+                    }
+            return query_url_to_results
+
+        for query_url_to_results in search_concurrently(
+            search, queries, self.max_concurrent_queries
+        ):
+            url_to_results.update(query_url_to_results or {})
 
         valid_url_to_snippets = self.webpage_helper.urls_to_snippets(
             list(url_to_results.keys())
@@ -352,10 +479,13 @@ class StanfordOvalArxivRM(dspy.Retrieve):
 
         return {"StanfordOvalArxivRM": usage}
 
+    def search_cache_params(self) -> dict:
+        return {"k": self.k, "endpoint": self.endpoint, "rerank": self.rerank}
+
     def _retrieve(self, query: str):
         payload = {"query": query, "num_blocks": self.k, "rerank": self.rerank}
 
-        response = requests.post(
+        response = get_http_session().post(
             self.endpoint, json=payload, headers={"Content-Type": "application/json"}
         )
 
@@ -415,6 +545,9 @@ class SerperRM(dspy.Retrieve):
         min_char_count: int = 150,
         snippet_chunk_size: int = 1000,
         webpage_helper_max_threads=10,
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+        max_batch_size: int = 100,
+        batch_window: float = 0.02,
     ):
         """Args:
         serper_search_api_key str: API key to run serper, can be found by creating an account on https://serper.dev/
@@ -433,8 +566,19 @@ class SerperRM(dspy.Retrieve):
                 qdr:w str: Date time range for past week.
                 qdr:m str: Date time range for past month.
                 qdr:y str: Date time range for past year.
+        max_concurrent_queries int: Maximum number of queries searched in parallel in one call when batching is disabled.
+        max_batch_size int: Maximum number of queries sent in one request to Serper's batch endpoint
+            (at most 100). Set to 1 to send every query on its own.
+        batch_window float: Seconds to wait for queries from concurrent `forward` calls (e.g. the
+            parallel searches of `Retriever`) to join a batch.
         """
         super().__init__(k=k)
+        self.max_concurrent_queries = max_concurrent_queries
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self._batcher = MicroBatcher(
+            self.serper_batch_runner, max_batch_size=max_batch_size, window=batch_window
+        )
         self.usage = 0
         self.query_params = None
         self.ENABLE_EXTRA_SNIPPET_EXTRACTION = ENABLE_EXTRA_SNIPPET_EXTRACTION
@@ -471,7 +615,7 @@ class SerperRM(dspy.Retrieve):
             "Content-Type": "application/json",
         }
 
-        response = requests.request(
+        response = get_http_session().request(
             "POST", self.search_url, headers=headers, json=query_params
         )
 
@@ -482,11 +626,43 @@ class SerperRM(dspy.Retrieve):
 
         return response.json()
 
+    def serper_batch_runner(self, query_params_list):
+        """
+        Searches several queries with one request to the batch endpoint.
+
+        Returns:
+            The result of every query, in order. If the batch request fails, the queries are searched
+            one by one and a query that still fails gets None.
+        """
+        if len(query_params_list) == 1:
+            return [self.serper_runner(query_params_list[0])]
+        try:
+            results = self.serper_runner(query_params_list)
+            if not isinstance(results, list) or len(results) != len(query_params_list):
+                raise RuntimeError(
+                    f"Expected a list of {len(query_params_list)} results, got {type(results).__name__}."
+                )
+            return results
+        except Exception as e:
+            logging.warning(
+                f"Serper batch request failed, searching its {len(query_params_list)} queries one by one: {e}"
+            )
+            return search_concurrently(
+                self.serper_runner, query_params_list, self.max_concurrent_queries
+            )
+
     def get_usage_and_reset(self):
         usage = self.usage
         self.usage = 0
         return {"SerperRM": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "query_params": self.query_params,
+            "extra_snippet_extraction": self.ENABLE_EXTRA_SNIPPET_EXTRACTION,
+            **_webpage_helper_params(self.webpage_helper),
+        }
+
     def forward(self, query_or_queries: Union[str, List[str]], exclude_urls: List[str]):
         """
         Calls the API and searches for the query passed in.
@@ -506,29 +682,42 @@ class SerperRM(dspy.Retrieve):
         )
 
         self.usage += len(queries)
-        self.results = []
-        collected_results = []
-        for query in queries:
-            if query == "Queries:":
-                continue
-            query_params = self.query_params
 
+        def to_query_params(query):
             # All available parameters can be found in the playground: https://serper.dev/playground
-            # Sets the json value for query to be the query that is being parsed.
-            query_params["q"] = query
+            # The query and the type (search, images, video, places, maps etc. that Google provides)
+            # go into a copy so that `self.query_params` stays safe to share between threads.
+            return {**self.query_params, "q": query, "type": "search"}
 
-            # Sets the type to be search, can be images, video, places, maps etc that Google provides.
-            query_params["type"] = "search"
-
-            self.result = self.serper_runner(query_params)
-            self.results.append(self.result)
+        queries = [query for query in queries if query != "Queries:"]
+        if self.max_batch_size > 1:
+            results = []
+            futures = self._batcher.submit([to_query_params(q) for q in queries])
+            for query, future in zip(queries, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logging.error(f"Error occurs when searching query {query}: {e}")
+            results = [result for result in results if result is not None]
+        else:
+            results = [
+                result
+                for result in search_concurrently(
+                    lambda query: self.serper_runner(to_query_params(query)),
+                    queries,
+                    self.max_concurrent_queries,
+                )
+                if result is not None
+            ]
+        # Kept for backward compatibility; concurrent calls each work on their own `results`.
+        self.results = results
 
         # Array of dictionaries that will be used by Storm to create the jsons
         collected_results = []
 
         if self.ENABLE_EXTRA_SNIPPET_EXTRACTION:
             urls = []
-            for result in self.results:
+            for result in results:
                 organic_results = result.get("organic", [])
                 for organic in organic_results:
                     url = organic.get("link")
@@ -538,7 +727,7 @@ class SerperRM(dspy.Retrieve):
         else:
             valid_url_to_snippets = {}
 
-        for result in self.results:
+        for result in results:
             try:
                 # An array of dictionaries that contains the snippets, title of the document and url that will be used.
                 organic_results = result.get("organic")
@@ -569,9 +758,14 @@ class SerperRM(dspy.Retrieve):
 
 class BraveRM(dspy.Retrieve):
     def __init__(
-        self, brave_search_api_key=None, k=3, is_valid_source: Callable = None
+        self,
+        brave_search_api_key=None,
+        k=3,
+        is_valid_source: Callable = None,
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
     ):
         super().__init__(k=k)
+        self.max_concurrent_queries = max_concurrent_queries
         if not brave_search_api_key and not os.environ.get("BRAVE_API_KEY"):
             raise RuntimeError(
                 "You must supply brave_search_api_key or set environment variable BRAVE_API_KEY"
@@ -594,6 +788,9 @@ class BraveRM(dspy.Retrieve):
 
         return {"BraveRM": usage}
 
+    def search_cache_params(self) -> dict:
+        return {"k": self.k, "is_valid_source": _source_filter_id(self.is_valid_source)}
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -612,31 +809,32 @@ class BraveRM(dspy.Retrieve):
             else query_or_queries
         )
         self.usage += len(queries)
-        collected_results = []
-        for query in queries:
-            try:
-                headers = {
-                    "Accept": "application/json",
-                    "Accept-Encoding": "gzip",
-                    "X-Subscription-Token": self.brave_search_api_key,
+
+        def search(query):
+            headers = {
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip",
+                "X-Subscription-Token": self.brave_search_api_key,
+            }
+            response = get_http_session().get(
+                f"https://api.search.brave.com/res/v1/web/search?result_filter=web&q={query}",
+                headers=headers,
+            )
+            return [
+                {
+                    "snippets": result.get("extra_snippets", []),
+                    "title": result.get("title"),
+                    "url": result.get("url"),
+                    "description": result.get("description"),
                 }
-                response = requests.get(
-                    f"https://api.search.brave.com/res/v1/web/search?result_filter=web&q={query}",
-                    headers=headers,
-                ).json()
-                results = response.get("web", {}).get("results", [])
+                for result in response.json().get("web", {}).get("results", [])
+            ]
 
-                for result in results:
-                    collected_results.append(
-                        {
-                            "snippets": result.get("extra_snippets", []),
-                            "title": result.get("title"),
-                            "url": result.get("url"),
-                            "description": result.get("description"),
-                        }
-                    )
-            except Exception as e:
-                logging.error(f"Error occurs when searching query {query}: {e}")
+        collected_results = []
+        for results in search_concurrently(
+            search, queries, self.max_concurrent_queries
+        ):
+            collected_results.extend(results or [])
 
         return collected_results
 
@@ -676,6 +874,13 @@ class SearXNG(dspy.Retrieve):
         self.usage = 0
         return {"SearXNG": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "k": self.k,
+            "searxng_api_url": self.searxng_api_url,
+            "is_valid_source": _source_filter_id(self.is_valid_source),
+        }
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -704,7 +909,7 @@ class SearXNG(dspy.Retrieve):
         for query in queries:
             try:
                 params = {"q": query, "format": "json"}
-                response = requests.get(
+                response = get_http_session().get(
                     self.searxng_api_url, headers=headers, params=params
                 )
                 results = response.json()
@@ -785,6 +990,16 @@ class DuckDuckGoSearchRM(dspy.Retrieve):
         self.usage = 0
         return {"DuckDuckGoRM": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "k": self.k,
+            "backend": self.duck_duck_go_backend,
+            "safe_search": self.duck_duck_go_safe_search,
+            "region": self.duck_duck_go_region,
+            "is_valid_source": _source_filter_id(self.is_valid_source),
+            **_webpage_helper_params(self.webpage_helper),
+        }
+
     @backoff.on_exception(
         backoff.expo,
         (Exception,),
@@ -917,6 +1132,14 @@ class TavilySearchRM(dspy.Retrieve):
         self.usage = 0
         return {"TavilySearchRM": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "k": self.k,
+            "include_raw_content": self.include_raw_content,
+            "is_valid_source": _source_filter_id(self.is_valid_source),
+            **_webpage_helper_params(self.webpage_helper),
+        }
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -991,6 +1214,7 @@ class GoogleSearch(dspy.Retrieve):
         min_char_count: int = 150,
         snippet_chunk_size: int = 1000,
         webpage_helper_max_threads=10,
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
     ):
         """
         Params:
@@ -1003,8 +1227,10 @@ class GoogleSearch(dspy.Retrieve):
             min_char_count: Minimum character count for the article to be considered valid.
             snippet_chunk_size: Maximum character count for each snippet.
             webpage_helper_max_threads: Maximum number of threads to use for webpage helper.
+            max_concurrent_queries: Maximum number of queries searched in parallel in one call.
         """
         super().__init__(k=k)
+        self.max_concurrent_queries = max_concurrent_queries
         try:
             from googleapiclient.discovery import build
         except ImportError as err:
@@ -1033,6 +1259,9 @@ class GoogleSearch(dspy.Retrieve):
         self.service = build(
             "customsearch", "v1", developerKey=self.google_search_api_key
         )
+        # The service's httplib2 connection is not thread-safe, so every search thread builds its own.
+        self._build_service = build
+        self._thread_local = threading.local()
         self.webpage_helper = WebPageHelper(
             min_char_count=min_char_count,
             snippet_chunk_size=snippet_chunk_size,
@@ -1045,6 +1274,24 @@ class GoogleSearch(dspy.Retrieve):
         self.usage = 0
         return {"GoogleSearch": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "k": self.k,
+            "google_cse_id": self.google_cse_id,
+            "is_valid_source": _source_filter_id(self.is_valid_source),
+            **_webpage_helper_params(self.webpage_helper),
+        }
+
+    def _get_service(self):
+        if threading.current_thread() is threading.main_thread():
+            return self.service
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            service = self._thread_local.service = self._build_service(
+                "customsearch", "v1", developerKey=self.google_search_api_key
+            )
+        return service
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -1066,32 +1313,35 @@ class GoogleSearch(dspy.Retrieve):
 
         url_to_results = {}
 
-        for query in queries:
-            try:
-                response = (
-                    self.service.cse()
-                    .list(
-                        q=query,
-                        cx=self.google_cse_id,
-                        num=self.k,
-                    )
-                    .execute()
+        def search(query):
+            response = (
+                self._get_service()
+                .cse()
+                .list(
+                    q=query,
+                    cx=self.google_cse_id,
+                    num=self.k,
                 )
+                .execute()
+            )
+            query_url_to_results = {}
+            for item in response.get("items", []):
+                if (
+                    self.is_valid_source(item["link"])
+                    and item["link"] not in exclude_urls
+                ):
+                    query_url_to_results[item["link"]] = {
+                        "title": item["title"],
+                        "url": item["link"],
+                        # "snippet": item.get("snippet", ""),  # Google search snippet is very short.
+                        "description": item.get("snippet", ""),
+                    }
+            return query_url_to_results
 
-                for item in response.get("items", []):
-                    if (
-                        self.is_valid_source(item["link"])
-                        and item["link"] not in exclude_urls
-                    ):
-                        url_to_results[item["link"]] = {
-                            "title": item["title"],
-                            "url": item["link"],
-                            # "snippet": item.get("snippet", ""),  # Google search snippet is very short.
-                            "description": item.get("snippet", ""),
-                        }
-
-            except Exception as e:
-                logging.error(f"Error occurred while searching query {query}: {e}")
+        for query_url_to_results in search_concurrently(
+            search, queries, self.max_concurrent_queries
+        ):
+            url_to_results.update(query_url_to_results or {})
 
         valid_url_to_snippets = self.webpage_helper.urls_to_snippets(
             list(url_to_results.keys())
@@ -1119,6 +1369,7 @@ class AzureAISearch(dspy.Retrieve):
         azure_ai_search_index_name=None,
         k=3,
         is_valid_source: Callable = None,
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
     ):
         """
         Params:
@@ -1131,8 +1382,10 @@ class AzureAISearch(dspy.Retrieve):
             min_char_count: Minimum character count for the article to be considered valid.
             snippet_chunk_size: Maximum character count for each snippet.
             webpage_helper_max_threads: Maximum number of threads to use for webpage helper.
+            max_concurrent_queries: Maximum number of queries searched in parallel in one call.
         """
         super().__init__(k=k)
+        self.max_concurrent_queries = max_concurrent_queries
 
         try:
             from azure.core.credentials import AzureKeyCredential
@@ -1187,6 +1440,13 @@ class AzureAISearch(dspy.Retrieve):
 
         return {"AzureAISearch": usage}
 
+    def search_cache_params(self) -> dict:
+        return {
+            "k": self.k,
+            "azure_ai_search_url": self.azure_ai_search_url,
+            "azure_ai_search_index_name": self.azure_ai_search_index_name,
+        }
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -1219,20 +1479,24 @@ class AzureAISearch(dspy.Retrieve):
             self.azure_ai_search_index_name,
             AzureKeyCredential(self.azure_ai_search_api_key),
         )
-        for query in queries:
-            try:
-                # https://learn.microsoft.com/en-us/python/api/azure-search-documents/azure.search.documents.searchclient?view=azure-python#azure-search-documents-searchclient-search
-                results = client.search(search_text=query, top=1)
-
-                for result in results:
-                    document = {
-                        "url": result["metadata_storage_path"],
-                        "title": result["title"],
-                        "description": "N/A",
-                        "snippets": [result["chunk"]],
-                    }
-                    collected_results.append(document)
-            except Exception as e:
-                logging.error(f"Error occurs when searching query {query}: {e}")
+
+        def search(query):
+            # https://learn.microsoft.com/en-us/python/api/azure-search-documents/azure.search.documents.searchclient?view=azure-python#azure-search-documents-searchclient-search
+            # SearchClient is thread-safe. The result pager is consumed here so that paging and
+            # parsing errors stay with their query.
+            return [
+                {
+                    "url": result["metadata_storage_path"],
+                    "title": result["title"],
+                    "description": "N/A",
+                    "snippets": [result["chunk"]],
+                }
+                for result in client.search(search_text=query, top=1)
+            ]
+
+        for documents in search_concurrently(
+            search, queries, self.max_concurrent_queries
+        ):
+            collected_results.extend(documents or [])
 
         return collected_results
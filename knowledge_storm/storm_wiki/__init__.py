@@ -1,2 +1,41 @@
-from .engine import *
-from .modules import *
+from ..lazy_imports import lazy_exports
+
+_EXPORTS = {
+    ".engine": ["STORMWikiLMConfigs", "STORMWikiRunnerArguments", "STORMWikiRunner"],
+    ".modules.knowledge_curation": [
+        "ConvSimulator",
+        "WikiWriter",
+        "AskQuestion",
+        "AskQuestionWithPersona",
+        "QuestionToQuery",
+        "AnswerQuestion",
+        "TopicExpert",
+        "StormKnowledgeCurationModule",
+    ],
+    ".modules.persona_generator": [
+        "get_wiki_page_title_and_toc",
+        "FindRelatedTopic",
+        "GenPersona",
+        "CreateWriterWithPersona",
+        "StormPersonaGenerator",
+    ],
+    ".modules.retriever": [
+        "GENERALLY_UNRELIABLE",
+        "DEPRECATED",
+        "BLACKLISTED",
+        "is_valid_wikipedia_source",
+    ],
+    ".modules.storm_dataclass": [
+        "DialogueTurn",
+        "StormInformationTable",
+        "StormArticle",
+    ],
+    ".modules.outline_generation": [
+        "StormOutlineGenerationModule",
+        "WritePageOutline",
+    ],
+    ".modules.article_generation": ["StormArticleGenerationModule"],
+    ".modules.article_polish": ["StormArticlePolishingModule"],
+    ".modules.callback": ["BaseCallbackHandler"],
+}
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 from dataclasses import dataclass, field
@@ -13,6 +12,7 @@ from .modules.knowledge_curation import StormKnowledgeCurationModule
 from .modules.outline_generation import StormOutlineGenerationModule
 from .modules.persona_generator import StormPersonaGenerator
 from .modules.storm_dataclass import StormInformationTable, StormArticle
+from ..http_session import configure_http_pool
 from ..interface import Engine, LMConfigs, Retriever
 from ..lm import LitellmModel
 from ..utils import FileIOHelper, makeStringRed, truncate_filename
@@ -166,6 +166,31 @@ class STORMWikiRunnerArguments:
             "Consider reducing it if keep getting 'Exceed rate limit' error when calling LM API."
         },
     )
+    stream_article: bool = field(
+        default=False,
+        metadata={
+            "help": "If True, stream the generated sections and the polished article to "
+            "`callback_handler.on_section_token` as they are generated."
+        },
+    )
+    lm_history_max_entries: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "Maximum number of LM calls kept in memory per language model. None keeps all."
+        },
+    )
+    lm_history_max_bytes: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "Maximum size in bytes of the LM calls kept in memory per language model. None keeps all."
+        },
+    )
+    lm_history_sink_dir: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "If set, stream every LM call to a JSONL file in this directory instead of keeping the full history in memory."
+        },
+    )
 
 
 class STORMWikiRunner(Engine):
@@ -177,6 +202,17 @@ class STORMWikiRunner(Engine):
         super().__init__(lm_configs=lm_configs)
         self.args = args
         self.lm_configs = lm_configs
+        configure_http_pool(self.args.max_thread_num)
+        if (
+            self.args.lm_history_max_entries is not None
+            or self.args.lm_history_max_bytes is not None
+            or self.args.lm_history_sink_dir is not None
+        ):
+            self.lm_configs.set_lm_history_policy(
+                max_entries=self.args.lm_history_max_entries,
+                max_bytes=self.args.lm_history_max_bytes,
+                sink_dir=self.args.lm_history_sink_dir,
+            )
 
         self.retriever = Retriever(rm=rm, max_thread=self.args.max_thread_num)
         storm_persona_generator = StormPersonaGenerator(
@@ -199,10 +235,12 @@ class STORMWikiRunner(Engine):
             article_gen_lm=self.lm_configs.article_gen_lm,
             retrieve_top_k=self.args.retrieve_top_k,
             max_thread_num=self.args.max_thread_num,
+            stream=self.args.stream_article,
         )
         self.storm_article_polishing_module = StormArticlePolishingModule(
             article_gen_lm=self.lm_configs.article_gen_lm,
             article_polish_lm=self.lm_configs.article_polish_lm,
+            stream=self.args.stream_article,
         )
 
         self.lm_configs.init_check()
@@ -259,6 +297,10 @@ class STORMWikiRunner(Engine):
         information_table=StormInformationTable,
         callback_handler: BaseCallbackHandler = None,
     ) -> StormArticle:
+        # Persist snippet embeddings so regenerating the article does not re-encode them.
+        information_table.snippet_embedding_path = os.path.join(
+            self.article_output_dir, "snippet_embeddings.npy"
+        )
         draft_article = self.storm_article_generation.generate_article(
             topic=self.topic,
             information_table=information_table,
@@ -274,12 +316,16 @@ class STORMWikiRunner(Engine):
         return draft_article
 
     def run_article_polishing_module(
-        self, draft_article: StormArticle, remove_duplicate: bool = False
+        self,
+        draft_article: StormArticle,
+        remove_duplicate: bool = False,
+        callback_handler: BaseCallbackHandler = None,
     ) -> StormArticle:
         polished_article = self.storm_article_polishing_module.polish_article(
             topic=self.topic,
             draft_article=draft_article,
             remove_duplicate=remove_duplicate,
+            callback_handler=callback_handler,
         )
         FileIOHelper.write_str(
             polished_article.to_string(),
@@ -298,16 +344,11 @@ class STORMWikiRunner(Engine):
             config_log, os.path.join(self.article_output_dir, "run_config.json")
         )
 
-        llm_call_history = self.lm_configs.collect_and_reset_lm_history()
-        with open(
-            os.path.join(self.article_output_dir, "llm_call_history.jsonl"), "w"
-        ) as f:
-            for call in llm_call_history:
-                if "kwargs" in call:
-                    call.pop(
-                        "kwargs"
-                    )  # All kwargs are dumped together to run_config.json.
-                f.write(json.dumps(call) + "\n")
+        # All kwargs are dumped together to run_config.json.
+        self.lm_configs.dump_and_reset_lm_history(
+            os.path.join(self.article_output_dir, "llm_call_history.jsonl"),
+            exclude_keys=("kwargs",),
+        )
 
     def _load_information_table_from_local_fs(self, information_table_local_path):
         assert os.path.exists(information_table_local_path), makeStringRed(
@@ -437,5 +478,7 @@ class STORMWikiRunner(Engine):
                     url_to_info_path=url_to_info_path,
                 )
             self.run_article_polishing_module(
-                draft_article=draft_article, remove_duplicate=remove_duplicate
+                draft_article=draft_article,
+                remove_duplicate=remove_duplicate,
+                callback_handler=callback_handler,
             )
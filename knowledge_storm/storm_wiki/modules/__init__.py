@@ -1,4 +1,29 @@
-from .knowledge_curation import *
-from .persona_generator import *
-from .retriever import *
-from .storm_dataclass import *
+from ...lazy_imports import lazy_exports
+
+_EXPORTS = {
+    ".knowledge_curation": [
+        "ConvSimulator",
+        "WikiWriter",
+        "AskQuestion",
+        "AskQuestionWithPersona",
+        "QuestionToQuery",
+        "AnswerQuestion",
+        "TopicExpert",
+        "StormKnowledgeCurationModule",
+    ],
+    ".persona_generator": [
+        "get_wiki_page_title_and_toc",
+        "FindRelatedTopic",
+        "GenPersona",
+        "CreateWriterWithPersona",
+        "StormPersonaGenerator",
+    ],
+    ".retriever": [
+        "GENERALLY_UNRELIABLE",
+        "DEPRECATED",
+        "BLACKLISTED",
+        "is_valid_wikipedia_source",
+    ],
+    ".storm_dataclass": ["DialogueTurn", "StormInformationTable", "StormArticle"],
+}
+__getattr__, __dir__, __all__ = lazy_exports(__name__, _EXPORTS)
@@ -1,5 +1,6 @@
 import concurrent.futures
 import copy
+import functools
 import logging
 from concurrent.futures import as_completed
 from typing import List, Union
@@ -9,7 +10,7 @@ import dspy
 from .callback import BaseCallbackHandler
 from .storm_dataclass import StormInformationTable, StormArticle
 from ...interface import ArticleGenerationModule, Information
-from ...utils import ArticleTextProcessing
+from ...utils import ArticleTextProcessing, stream_predict
 
 
 class StormArticleGenerationModule(ArticleGenerationModule):
@@ -23,15 +24,28 @@ class StormArticleGenerationModule(ArticleGenerationModule):
         article_gen_lm=Union[dspy.dsp.LM, dspy.dsp.HFModel],
         retrieve_top_k: int = 5,
         max_thread_num: int = 10,
+        stream: bool = False,
     ):
+        """
+        Args:
+            stream (bool): If True, pass each section's text to `callback_handler.on_section_token`
+                as it is generated.
+        """
         super().__init__()
         self.retrieve_top_k = retrieve_top_k
         self.article_gen_lm = article_gen_lm
         self.max_thread_num = max_thread_num
+        self.stream = stream
         self.section_gen = ConvToSection(engine=self.article_gen_lm)
 
     def generate_section(
-        self, topic, section_name, information_table, section_outline, section_query
+        self,
+        topic,
+        section_name,
+        information_table,
+        section_outline,
+        section_query,
+        callback_handler: BaseCallbackHandler = None,
     ):
         collected_info: List[Information] = []
         if information_table is not None:
@@ -43,6 +57,7 @@ class StormArticleGenerationModule(ArticleGenerationModule):
             outline=section_outline,
             section=section_name,
             collected_info=collected_info,
+            callback_handler=callback_handler if self.stream else None,
         )
         return {
             "section_name": section_name,
@@ -85,6 +100,7 @@ class StormArticleGenerationModule(ArticleGenerationModule):
                 information_table=information_table,
                 section_outline="",
                 section_query=[topic],
+                callback_handler=callback_handler,
             )
             section_output_dict_collection = [section_output_dict]
         else:
@@ -116,6 +132,7 @@ class StormArticleGenerationModule(ArticleGenerationModule):
                             information_table,
                             section_outline,
                             section_query,
+                            callback_handler,
                         )
                     ] = section_title
 
@@ -142,8 +159,14 @@ class ConvToSection(dspy.Module):
         self.engine = engine
 
     def forward(
-        self, topic: str, outline: str, section: str, collected_info: List[Information]
+        self,
+        topic: str,
+        outline: str,
+        section: str,
+        collected_info: List[Information],
+        callback_handler: BaseCallbackHandler = None,
     ):
+        """Writes the section, streaming its text to `callback_handler.on_section_token` if a handler is given."""
         info = ""
         for idx, storm_info in enumerate(collected_info):
             info += f"[{idx + 1}]\n" + "\n".join(storm_info.snippets)
@@ -152,9 +175,20 @@ class ConvToSection(dspy.Module):
         info = ArticleTextProcessing.limit_word_count_preserve_newline(info, 1500)
 
         with dspy.settings.context(lm=self.engine):
-            section = ArticleTextProcessing.clean_up_section(
-                self.write_section(topic=topic, info=info, section=section).output
-            )
+            if callback_handler is None:
+                output = self.write_section(
+                    topic=topic, info=info, section=section
+                ).output
+            else:
+                output = stream_predict(
+                    WriteSection,
+                    self.engine,
+                    functools.partial(callback_handler.on_section_token, section),
+                    topic=topic,
+                    info=info,
+                    section=section,
+                ).output
+            section = ArticleTextProcessing.clean_up_section(output)
 
         return dspy.Prediction(section=section)
 
@@ -167,8 +201,10 @@ class WriteSection(dspy.Signature):
         2. Use [1], [2], ..., [n] in line (for example, "The capital of the United States is Washington, D.C.[1][3]."). You DO NOT need to include a References or Sources section to list the sources at the end.
     """
 
-    info = dspy.InputField(prefix="The collected information:\n", format=str)
+    # The topic precedes the collected information so that calls for the same topic share a
+    # longer prompt prefix for provider-side prompt caching.
     topic = dspy.InputField(prefix="The topic of the page: ", format=str)
+    info = dspy.InputField(prefix="The collected information:\n", format=str)
     section = dspy.InputField(prefix="The section you need to write: ", format=str)
     output = dspy.OutputField(
         prefix="Write the section with proper inline citations (Start your writing with # section title. Don't include the page title or try to write other sections):\n",
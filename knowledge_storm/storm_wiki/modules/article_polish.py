@@ -1,11 +1,13 @@
 import copy
+import functools
 from typing import Union
 
 import dspy
 
+from .callback import BaseCallbackHandler
 from .storm_dataclass import StormArticle
 from ...interface import ArticlePolishingModule
-from ...utils import ArticleTextProcessing
+from ...utils import ArticleTextProcessing, stream_predict
 
 
 class StormArticlePolishingModule(ArticlePolishingModule):
@@ -18,16 +20,27 @@ class StormArticlePolishingModule(ArticlePolishingModule):
         self,
         article_gen_lm: Union[dspy.dsp.LM, dspy.dsp.HFModel],
         article_polish_lm: Union[dspy.dsp.LM, dspy.dsp.HFModel],
+        stream: bool = False,
     ):
+        """
+        Args:
+            stream (bool): If True, pass the lead section and the polished page to
+                `callback_handler.on_section_token` as they are generated.
+        """
         self.article_gen_lm = article_gen_lm
         self.article_polish_lm = article_polish_lm
+        self.stream = stream
 
         self.polish_page = PolishPageModule(
             write_lead_engine=self.article_gen_lm, polish_engine=self.article_polish_lm
         )
 
     def polish_article(
-        self, topic: str, draft_article: StormArticle, remove_duplicate: bool = False
+        self,
+        topic: str,
+        draft_article: StormArticle,
+        remove_duplicate: bool = False,
+        callback_handler: BaseCallbackHandler = None,
     ) -> StormArticle:
         """
         Polish article.
@@ -36,11 +49,16 @@ class StormArticlePolishingModule(ArticlePolishingModule):
             topic (str): The topic of the article.
             draft_article (StormArticle): The draft article.
             remove_duplicate (bool): Whether to use one additional LM call to remove duplicates from the article.
+            callback_handler (BaseCallbackHandler): An optional callback handler that receives the generated
+                text through `on_section_token` if streaming is enabled. Defaults to None.
         """
 
         article_text = draft_article.to_string()
         polish_result = self.polish_page(
-            topic=topic, draft_page=article_text, polish_whole_page=remove_duplicate
+            topic=topic,
+            draft_page=article_text,
+            polish_whole_page=remove_duplicate,
+            callback_handler=callback_handler if self.stream else None,
         )
         lead_section = f"# summary\n{polish_result.lead_section}"
         polished_article = "\n\n".join([lead_section, polish_result.page])
@@ -84,18 +102,45 @@ class PolishPageModule(dspy.Module):
         self.write_lead = dspy.Predict(WriteLeadSection)
         self.polish_page = dspy.Predict(PolishPage)
 
-    def forward(self, topic: str, draft_page: str, polish_whole_page: bool = True):
+    def forward(
+        self,
+        topic: str,
+        draft_page: str,
+        polish_whole_page: bool = True,
+        callback_handler: BaseCallbackHandler = None,
+    ):
+        """
+        Writes the lead section and optionally polishes the page. If a callback handler is given, the
+        lead section is streamed to `on_section_token` as "summary" and the polished page under the topic.
+        """
         # NOTE: Change show_guidelines to false to make the generation more robust to different LM families.
         with dspy.settings.context(lm=self.write_lead_engine, show_guidelines=False):
-            lead_section = self.write_lead(
-                topic=topic, draft_page=draft_page
-            ).lead_section
+            if callback_handler is None:
+                lead_section = self.write_lead(
+                    topic=topic, draft_page=draft_page
+                ).lead_section
+            else:
+                lead_section = stream_predict(
+                    WriteLeadSection,
+                    self.write_lead_engine,
+                    functools.partial(callback_handler.on_section_token, "summary"),
+                    topic=topic,
+                    draft_page=draft_page,
+                ).lead_section
             if "The lead section:" in lead_section:
                 lead_section = lead_section.split("The lead section:")[1].strip()
         if polish_whole_page:
             # NOTE: Change show_guidelines to false to make the generation more robust to different LM families.
             with dspy.settings.context(lm=self.polish_engine, show_guidelines=False):
-                page = self.polish_page(draft_page=draft_page).page
+                if callback_handler is None:
+                    page = self.polish_page(draft_page=draft_page).page
+                else:
+                    page = stream_predict(
+                        PolishPage,
+                        self.polish_engine,
+                        functools.partial(callback_handler.on_section_token, topic),
+                        draft_page=draft_page,
+                    ).page
         else:
             page = draft_page
 
@@ -32,3 +32,7 @@ class BaseCallbackHandler:
     def on_outline_refinement_end(self, outline: str, **kwargs):
         """Run when the outline refinement finishes."""
         pass
+
+    def on_section_token(self, section_name: str, token: str, **kwargs):
+        """Run when a chunk of text is generated for a section, if article streaming is enabled."""
+        pass
@@ -1,12 +1,13 @@
 import copy
+import hashlib
+import os
 import re
 from collections import OrderedDict
 from typing import Union, Optional, Any, List, Tuple, Dict
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
+from ...encoder import DEFAULT_SENTENCE_TRANSFORMER, get_sentence_transformer
 from ...interface import Information, InformationTable, Article, ArticleSectionNode
 from ...utils import ArticleTextProcessing, FileIOHelper
 
@@ -61,6 +62,9 @@ class StormInformationTable(InformationTable):
         self.url_to_info: Dict[str, Information] = (
             StormInformationTable.construct_url_to_info(self.conversations)
         )
+        # If set, snippet embeddings are persisted to this .npy file (plus a metadata json next to
+        # it) and reused by later calls of prepare_table_for_retrieval.
+        self.snippet_embedding_path: Optional[str] = None
 
     @staticmethod
     def construct_url_to_info(
@@ -106,15 +110,97 @@ class StormInformationTable(InformationTable):
             conversations.append((persona, dialogue_turns))
         return cls(conversations)
 
-    def prepare_table_for_retrieval(self):
-        self.encoder = SentenceTransformer("paraphrase-MiniLM-L6-v2")
+    def prepare_table_for_retrieval(
+        self,
+        embedding_model_name: str = DEFAULT_SENTENCE_TRANSFORMER,
+        device: Optional[str] = None,
+    ):
+        # Reuse the process-wide model instead of reloading weights for every article.
+        self.encoder = get_sentence_transformer(embedding_model_name, device=device)
         self.collected_urls = []
         self.collected_snippets = []
         for url, information in self.url_to_info.items():
             for snippet in information.snippets:
                 self.collected_urls.append(url)
                 self.collected_snippets.append(snippet)
-        self.encoded_snippets = self.encoder.encode(self.collected_snippets)
+        # Store L2-normalized float32 vectors so cosine similarity is a plain matrix product.
+        if self.snippet_embedding_path is None:
+            self.encoded_snippets = self._encode_normalized(self.collected_snippets)
+        else:
+            self.encoded_snippets = self._load_or_encode_snippets(
+                self.snippet_embedding_path, embedding_model_name
+            )
+
+    @staticmethod
+    def _snippet_hash(snippet: str) -> str:
+        return hashlib.sha256(snippet.encode("utf-8")).hexdigest()
+
+    def _load_or_encode_snippets(
+        self, embedding_path: str, embedding_model_name: str
+    ) -> np.ndarray:
+        """
+        Reuses snippet embeddings persisted at `embedding_path` and only encodes snippets whose content
+        hash is not found there. The file is memory-mapped when no snippet has changed and rewritten
+        otherwise.
+        """
+        meta_path = os.path.splitext(embedding_path)[0] + "_meta.json"
+        snippet_hashes = [
+            self._snippet_hash(snippet) for snippet in self.collected_snippets
+        ]
+        stored_embeddings, stored_hashes = None, []
+        if os.path.exists(embedding_path) and os.path.exists(meta_path):
+            meta = FileIOHelper.load_json(meta_path)
+            if meta.get("model") == embedding_model_name:
+                stored_embeddings = np.load(embedding_path, mmap_mode="r")
+                stored_hashes = meta["snippet_hashes"]
+        if stored_embeddings is not None and snippet_hashes == stored_hashes:
+            return stored_embeddings
+
+        hash_to_row = {
+            snippet_hash: row for row, snippet_hash in enumerate(stored_hashes)
+        }
+
+        missing = [
+            idx
+            for idx, snippet_hash in enumerate(snippet_hashes)
+            if snippet_hash not in hash_to_row
+        ]
+        encoded_missing = self._encode_normalized(
+            [self.collected_snippets[idx] for idx in missing]
+        )
+        if not self.collected_snippets:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+        else:
+            dim = encoded_missing.shape[1] if missing else stored_embeddings.shape[1]
+            embeddings = np.empty((len(self.collected_snippets), dim), dtype=np.float32)
+            missing_set = set(missing)
+            reused = [
+                idx for idx in range(len(snippet_hashes)) if idx not in missing_set
+            ]
+            if reused:
+                embeddings[reused] = stored_embeddings[
+                    [hash_to_row[snippet_hashes[idx]] for idx in reused]
+                ]
+            if missing:
+                embeddings[missing] = encoded_missing
+        del stored_embeddings
+
+        tmp_path = embedding_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_path, embedding_path)
+        FileIOHelper.dump_json(
+            {"model": embedding_model_name, "snippet_hashes": snippet_hashes},
+            meta_path,
+        )
+        return embeddings
+
+    def _encode_normalized(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(
+            self.encoder.encode(texts, normalize_embeddings=True), dtype=np.float32
+        )
 
     def retrieve_information(
         self, queries: Union[List[str], str], search_top_k
@@ -123,13 +209,19 @@ class StormInformationTable(InformationTable):
         selected_snippets = []
         if type(queries) is str:
             queries = [queries]
-        for query in queries:
-            encoded_query = self.encoder.encode(query)
-            sim = cosine_similarity([encoded_query], self.encoded_snippets)[0]
-            sorted_indices = np.argsort(sim)
-            for i in sorted_indices[-search_top_k:][::-1]:
-                selected_urls.append(self.collected_urls[i])
-                selected_snippets.append(self.collected_snippets[i])
+        top_k = min(search_top_k, len(self.collected_snippets))
+        if queries and top_k > 0:
+            # Encode all queries in one batch and score them with a single matrix product.
+            sim = self._encode_normalized(queries) @ self.encoded_snippets.T
+            top_indices = np.argpartition(-sim, top_k - 1, axis=1)[:, :top_k]
+            top_sim = np.take_along_axis(sim, top_indices, axis=1)
+            top_indices = np.take_along_axis(
+                top_indices, np.argsort(-top_sim, axis=1), axis=1
+            )
+            for query_top_indices in top_indices:
+                for i in query_top_indices:
+                    selected_urls.append(self.collected_urls[i])
+                    selected_snippets.append(self.collected_snippets[i])
 
         url_to_snippets = {}
         for url, snippet in zip(selected_urls, selected_snippets):
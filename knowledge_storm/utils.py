@@ -1,24 +1,53 @@
+import asyncio
 import concurrent.futures
 import dspy
+import hashlib
 import httpx
 import json
 import logging
 import os
 import pickle
+import queue
 import re
 import regex
 import sys
+import threading
+import time
 import toml
-from typing import List, Dict
+from concurrent.futures.process import BrokenProcessPool
+from dspy.signatures.signature import signature_to_template
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterator,
+    List,
+    Dict,
+    Optional,
+    Tuple,
+    Union,
+)
 from tqdm import tqdm
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from trafilatura import extract
-
-from .lm import LitellmModel
+from .cache import DEFAULT_PAGE_CACHE_MAX_AGE, SQLiteCache, get_page_cache
+from .http_session import create_async_httpx_client, create_httpx_client
+from .lm import LitellmModel, SingleFlight
+from .webpage_extraction import (
+    DEFAULT_EXTRACTION_PROCESSES,
+    discard_extraction_pool,
+    extract_article,
+    get_extraction_pool,
+    get_text_splitter,
+)
 
 logging.getLogger("httpx").setLevel(logging.WARNING)  # Disable INFO logging for httpx.
 
+# The page cache maps each URL to the hash of its last fetched content, and each content hash to its
+# extracted article, so pages served under several URLs are extracted once.
+_PAGE_NAMESPACE = "page"
+_EXTRACTION_NAMESPACE = "extraction"
+# Shared by all helpers so that concurrent calls, even from different event loops, fetch a URL once.
+_page_fetches = SingleFlight()
+
 
 def truncate_filename(filename, max_length=125):
     """Truncate filename to max_length to ensure the filename won't exceed the file system limit.
@@ -57,6 +86,42 @@ def makeStringRed(message):
     return f"\033[91m {message}\033[00m"
 
 
+def stream_predict(
+    signature, lm, on_token: Callable[[str], None], **kwargs
+) -> dspy.Prediction:
+    """
+    Runs `signature` with `lm` like `dspy.Predict`, passing the completion to `on_token` chunk by
+    chunk as it is generated.
+
+    The prompt is rendered and the output fields are extracted with the same template as
+    `dspy.Predict`, so the prediction matches the non-streaming one. Call it inside
+    `dspy.settings.context(...)` to apply settings such as `show_guidelines`. An LM without a
+    `stream` method is called as usual and its whole completion is passed to `on_token` at once.
+
+    Args:
+        signature: The dspy.Signature to run.
+        lm: The LM to call.
+        on_token: Called with each chunk of the completion text.
+        **kwargs: The input fields of the signature.
+    """
+    template = signature_to_template(signature)
+    example = dspy.dsp.Example(demos=[], **kwargs)
+    prompt = template(example)
+    if hasattr(lm, "stream"):
+        chunks = []
+        for chunk in lm.stream(prompt):
+            chunks.append(chunk)
+            on_token(chunk)
+        completion = "".join(chunks)
+    else:
+        completion = lm(prompt)[0]
+        on_token(completion)
+    completed = template.extract(example, completion)
+    return dspy.Prediction(
+        **{name: completed.get(name, "") for name in signature.output_fields}
+    )
+
+
 class QdrantVectorStoreManager:
     """
     Helper class for managing the Qdrant vector store, can be used with `VectorRM` in rm.py.
@@ -633,6 +698,12 @@ class FileIOHelper:
 class WebPageHelper:
     """Helper class to process web pages.
 
+    Pages are fetched asynchronously, with at most `max_thread_num` downloads in flight and at most
+    `max_connections_per_host` per host, while text extraction and chunking run in a shared process
+    pool. Each URL is extracted as soon as its download finishes, so network and CPU work overlap.
+    Extracted pages are kept in an on-disk cache, and a URL that is already being fetched by another
+    call in the process is waited for rather than fetched again.
+
     Acknowledgement: Part of the code is adapted from https://github.com/stanford-oval/WikiChat project.
     """
 
@@ -641,35 +712,34 @@ class WebPageHelper:
         min_char_count: int = 150,
         snippet_chunk_size: int = 1000,
         max_thread_num: int = 10,
+        max_connections_per_host: int = 4,
+        extraction_processes: Optional[int] = DEFAULT_EXTRACTION_PROCESSES,
+        page_cache: Union[bool, SQLiteCache] = True,
+        page_cache_max_age: Optional[float] = DEFAULT_PAGE_CACHE_MAX_AGE,
     ):
         """
         Args:
             min_char_count: Minimum character count for the article to be considered valid.
             snippet_chunk_size: Maximum character count for each snippet.
-            max_thread_num: Maximum number of threads to use for concurrent requests (e.g., downloading webpages).
+            max_thread_num: Maximum number of concurrent requests (e.g., downloading webpages).
+            max_connections_per_host: Maximum number of concurrent requests to the same host.
+            extraction_processes: Size of the process pool for text extraction and chunking, which is
+                shared by all helpers in the process. 0 or None extracts in threads instead.
+            page_cache: Where to cache extracted pages. True uses the cache from `get_page_cache()` (see
+                `configure_page_cache` for its path and size bound), False disables caching, and an
+                `SQLiteCache` is used as is.
+            page_cache_max_age: Seconds for which a cached page is used without contacting its server.
+                Older pages are revalidated with their ETag/Last-Modified. None never revalidates.
         """
-        self.httpx_client = httpx.Client(verify=False)
+        self.httpx_client = create_httpx_client(pool_size=max_thread_num, verify=False)
         self.min_char_count = min_char_count
+        self.snippet_chunk_size = snippet_chunk_size
         self.max_thread_num = max_thread_num
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=snippet_chunk_size,
-            chunk_overlap=0,
-            length_function=len,
-            is_separator_regex=False,
-            separators=[
-                "\n\n",
-                "\n",
-                ".",
-                "\uff0e",  # Fullwidth full stop
-                "\u3002",  # Ideographic full stop
-                ",",
-                "\uff0c",  # Fullwidth comma
-                "\u3001",  # Ideographic comma
-                " ",
-                "\u200B",  # Zero-width space
-                "",
-            ],
-        )
+        self.max_connections_per_host = max_connections_per_host
+        self.extraction_processes = extraction_processes
+        self.page_cache = page_cache
+        self.page_cache_max_age = page_cache_max_age
+        self.text_splitter = get_text_splitter(snippet_chunk_size)
 
     def download_webpage(self, url: str):
         try:
@@ -681,34 +751,256 @@ class WebPageHelper:
             print(f"Error while requesting {exc.request.url!r} - {exc!r}")
             return None
 
-    def urls_to_articles(self, urls: List[str]) -> Dict:
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_thread_num
-        ) as executor:
-            htmls = list(executor.map(self.download_webpage, urls))
+    async def _adownload_webpage(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        connection_slots: asyncio.Semaphore,
+        host_slots: Dict[str, asyncio.Semaphore],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[httpx.Response]:
+        try:
+            host = httpx.URL(url).host
+        except Exception as e:
+            print(f"Invalid URL {url!r} - {e!r}")
+            return None
+        if host not in host_slots:
+            host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        async with host_slots[host], connection_slots:
+            try:
+                res = await client.get(url, headers=headers, timeout=4)
+                if res.status_code >= 400:
+                    res.raise_for_status()
+                return res
+            except httpx.HTTPError as exc:
+                print(f"Error while requesting {exc.request.url!r} - {exc!r}")
+                return None
+
+    async def _aextract(self, html: bytes, split: bool):
+        args = (html, self.min_char_count, self.snippet_chunk_size if split else None)
+        loop = asyncio.get_running_loop()
+        if self.extraction_processes:
+            pool = get_extraction_pool(self.extraction_processes)
+            try:
+                return await loop.run_in_executor(pool, extract_article, *args)
+            except BrokenProcessPool as e:
+                logging.warning(f"Extraction pool broke, extracting in threads: {e}")
+                discard_extraction_pool(pool)
+                self.extraction_processes = None
+        return await loop.run_in_executor(None, extract_article, *args)
+
+    def _get_page_cache(self) -> Optional[SQLiteCache]:
+        if self.page_cache is True:
+            return get_page_cache()
+        return self.page_cache or None
+
+    def _extraction_key(self, content_hash: str, split: bool) -> str:
+        snippet_chunk_size = self.snippet_chunk_size if split else None
+        return f"{content_hash}:{self.min_char_count}:{snippet_chunk_size}"
+
+    def _is_fresh(self, page: Dict) -> bool:
+        return (
+            self.page_cache_max_age is None
+            or time.time() - page["fetched_at"] <= self.page_cache_max_age
+        )
 
-        articles = {}
+    async def _afetch_article(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        split: bool,
+        page: Optional[Dict],
+        connection_slots: asyncio.Semaphore,
+        host_slots: Dict[str, asyncio.Semaphore],
+    ) -> Optional[Dict]:
+        """
+        Downloads and extracts `url`, going through the page cache if there is one.
 
-        for h, u in zip(htmls, urls):
-            if h is None:
-                continue
-            article_text = extract(
-                h,
-                include_tables=False,
-                include_comments=False,
-                output_format="txt",
+        Args:
+            page: The cache entry of `url` ("content_hash", "etag", "last_modified", "fetched_at"), if
+                any. A fresh entry is served without a request and a stale one is revalidated.
+
+        Returns:
+            The article of `url`, or None if it failed to download or has too little text.
+        """
+        page_cache = self._get_page_cache()
+        if page_cache is None:
+            res = await self._adownload_webpage(
+                client, url, connection_slots, host_slots
+            )
+            return None if res is None else await self._aextract(res.content, split)
+
+        async def cached_extraction(content_hash):
+            # {} records a page with too little text.
+            return await asyncio.to_thread(
+                page_cache.get,
+                _EXTRACTION_NAMESPACE,
+                self._extraction_key(content_hash, split),
             )
-            if article_text is not None and len(article_text) > self.min_char_count:
-                articles[u] = {"text": article_text}
 
-        return articles
+        if page is not None and self._is_fresh(page):
+            article = await cached_extraction(page["content_hash"])
+            if article is not None:
+                return article or None
+            # The extraction was evicted, so a revalidation would not help.
+            page = None
+
+        headers = {}
+        if page is not None and page["etag"]:
+            headers["If-None-Match"] = page["etag"]
+        if page is not None and page["last_modified"]:
+            headers["If-Modified-Since"] = page["last_modified"]
+        res = await self._adownload_webpage(
+            client, url, connection_slots, host_slots, headers
+        )
+        if res is None:
+            return None
+        article = None
+        if res.status_code == 304 and page is not None:
+            content_hash = page["content_hash"]
+            article = await cached_extraction(content_hash)
+            if article is None:
+                res = await self._adownload_webpage(
+                    client, url, connection_slots, host_slots
+                )
+                if res is None:
+                    return None
+        if article is None:
+            content_hash = hashlib.sha256(res.content).hexdigest()
+            article = await cached_extraction(content_hash)
+            if article is None:
+                article = await self._aextract(res.content, split) or {}
+                await asyncio.to_thread(
+                    page_cache.put,
+                    _EXTRACTION_NAMESPACE,
+                    self._extraction_key(content_hash, split),
+                    article,
+                )
+        await asyncio.to_thread(
+            page_cache.put,
+            _PAGE_NAMESPACE,
+            url,
+            {
+                "content_hash": content_hash,
+                "etag": res.headers.get("etag"),
+                "last_modified": res.headers.get("last-modified"),
+                "fetched_at": time.time(),
+            },
+        )
+        return article or None
+
+    async def astream_articles(
+        self, urls: List[str], split: bool = True
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Downloads and extracts `urls`, yielding each (url, article) as soon as it is ready.
+
+        Args:
+            urls: The URLs to process. Duplicates are processed once.
+            split: Whether to also split each article into "snippets".
+
+        Yields:
+            The URL and a dict with its "text" (and "snippets"). URLs that fail to download or have too
+            little text are skipped.
+        """
+        connection_slots = asyncio.Semaphore(self.max_thread_num)
+        host_slots = {}
+        urls = list(dict.fromkeys(urls))
+        pages = {}
+        page_cache = self._get_page_cache()
+        if page_cache is not None and urls:
+            cached_pages = await asyncio.to_thread(
+                page_cache.get_many, _PAGE_NAMESPACE, urls
+            )
+            pages = dict(zip(urls, cached_pages))
+
+        async with create_async_httpx_client(
+            pool_size=self.max_thread_num, verify=False
+        ) as client:
+
+            async def process(url):
+                article = await _page_fetches.acall(
+                    (
+                        url,
+                        self.min_char_count,
+                        self.snippet_chunk_size if split else None,
+                    ),
+                    lambda: self._afetch_article(
+                        client,
+                        url,
+                        split,
+                        pages.get(url),
+                        connection_slots,
+                        host_slots,
+                    ),
+                )
+                return url, article
+
+            tasks = [asyncio.ensure_future(process(u)) for u in urls]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    url, article = await next_done
+                    if article is not None:
+                        yield url, article
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    def stream_snippets(self, urls: List[str]) -> Iterator[Tuple[str, Dict]]:
+        """Synchronous counterpart of `astream_articles`, yielding articles with their snippets as they complete."""
+        items = queue.Queue()
+        done = object()
+        stop = threading.Event()
+
+        async def pump():
+            async for item in self.astream_articles(urls):
+                if stop.is_set():
+                    break
+                items.put(item)
+
+        def run():
+            try:
+                asyncio.run(pump())
+            except BaseException as e:
+                items.put(e)
+            finally:
+                items.put(done)
+
+        threading.Thread(target=run, daemon=True).start()
+        try:
+            while (item := items.get()) is not done:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def _collect(self, urls: List[str], split: bool) -> Dict:
+        async def collect():
+            return {
+                url: article
+                async for url, article in self.astream_articles(urls, split)
+            }
+
+        articles = _run_coroutine(collect())
+        # Keep the order of `urls`, as callers build their results from it.
+        return {url: articles[url] for url in dict.fromkeys(urls) if url in articles}
+
+    def urls_to_articles(self, urls: List[str]) -> Dict:
+        return self._collect(urls, split=False)
 
     def urls_to_snippets(self, urls: List[str]) -> Dict:
-        articles = self.urls_to_articles(urls)
-        for u in articles:
-            articles[u]["snippets"] = self.text_splitter.split_text(articles[u]["text"])
+        return self._collect(urls, split=True)
 
-        return articles
+
+def _run_coroutine(coroutine):
+    """Runs `coroutine` to completion from synchronous code, even if this thread runs an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
 
 
 def user_input_appropriateness_check(user_input):
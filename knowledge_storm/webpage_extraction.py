@@ -0,0 +1,107 @@
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+# Kept free of heavy imports: extraction worker processes only import this module.
+
+DEFAULT_EXTRACTION_PROCESSES = min(4, os.cpu_count() or 1)
+
+SNIPPET_SEPARATORS = [
+    "\n\n",
+    "\n",
+    ".",
+    "\uff0e",  # Fullwidth full stop
+    "\u3002",  # Ideographic full stop
+    ",",
+    "\uff0c",  # Fullwidth comma
+    "\u3001",  # Ideographic comma
+    " ",
+    "\u200B",  # Zero-width space
+    "",
+]
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_text_splitter(snippet_chunk_size: int):
+    """Returns the splitter that cuts article text into snippets of at most `snippet_chunk_size` characters."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=snippet_chunk_size,
+        chunk_overlap=0,
+        length_function=len,
+        is_separator_regex=False,
+        separators=SNIPPET_SEPARATORS,
+    )
+
+
+def extract_article(
+    html: bytes, min_char_count: int, snippet_chunk_size: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    Extracts the main text of a web page and optionally splits it into snippets.
+
+    Args:
+        html: The downloaded page.
+        min_char_count: Pages whose text is not longer than this are discarded.
+        snippet_chunk_size: If not None, also split the text into snippets of at most this many
+            characters.
+
+    Returns:
+        {"text": ...} plus "snippets" if requested, or None if the page has too little text.
+    """
+    from trafilatura import extract
+
+    article_text = extract(
+        html,
+        include_tables=False,
+        include_comments=False,
+        output_format="txt",
+    )
+    if article_text is None or len(article_text) <= min_char_count:
+        return None
+    article = {"text": article_text}
+    if snippet_chunk_size is not None:
+        article["snippets"] = get_text_splitter(snippet_chunk_size).split_text(
+            article_text
+        )
+    return article
+
+
+def get_extraction_pool(
+    max_workers: int = DEFAULT_EXTRACTION_PROCESSES,
+) -> ProcessPoolExecutor:
+    """
+    Returns the process pool shared by every `WebPageHelper` in this process, creating it on first use.
+
+    Extraction is CPU-bound and holds the GIL, so running it in worker processes lets it overlap with
+    downloads instead of serializing behind them. Workers are spawned rather than forked because the
+    parent process runs many threads.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extraction_pool
+
+
+def discard_extraction_pool(pool: ProcessPoolExecutor):
+    """Drops `pool` (e.g. after it broke) so that the next `get_extraction_pool` starts a new one."""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    try:
+        pool.shutdown(wait=False, cancel_futures=True)
+    except Exception as e:
+        logging.warning(f"Failed to shut down the extraction pool: {e}")
@@ -0,0 +1,101 @@
+"""Benchmark the import time of knowledge_storm and fail if it goes over budget.
+
+Every measurement runs in a fresh interpreter so that nothing is served from `sys.modules`.
+The script exits with status 1 if the median import time of a scenario exceeds its budget, or if
+a scenario pulls in one of the heavy optional stacks.
+
+Usage:
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py --repeat 10 --package-budget 0.2 --runner-budget 4
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Stacks that must only be imported when a feature that needs them is used.
+HEAVY_MODULES = [
+    "anthropic",
+    "google.generativeai",
+    "langchain_huggingface",
+    "langchain_qdrant",
+    "langchain_text_splitters",
+    "qdrant_client",
+    "sentence_transformers",
+    "sklearn",
+    "torch",
+    "trafilatura",
+    "transformers",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "heavy_modules": [name for name in {heavy_modules!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(statement: str, repeat: int):
+    """Run `statement` in `repeat` fresh interpreters and return the timings and heavy imports."""
+    timings, heavy_modules = [], set()
+    probe = _PROBE.format(statement=statement, heavy_modules=HEAVY_MODULES)
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy_modules.update(result["heavy_modules"])
+    return timings, sorted(heavy_modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Fresh interpreters per scenario."
+    )
+    parser.add_argument(
+        "--package-budget",
+        type=float,
+        default=0.5,
+        help="Budget in seconds for a bare `import knowledge_storm`.",
+    )
+    parser.add_argument(
+        "--runner-budget",
+        type=float,
+        default=5.0,
+        help="Budget in seconds for importing STORMWikiRunner, LitellmModel and BingSearch.",
+    )
+    args = parser.parse_args()
+
+    scenarios = [
+        ("import knowledge_storm", args.package_budget),
+        (
+            "from knowledge_storm import STORMWikiRunner, LitellmModel, BingSearch",
+            args.runner_budget,
+        ),
+    ]
+    failed = False
+    for statement, budget in scenarios:
+        timings, heavy_modules = measure(statement, args.repeat)
+        median = statistics.median(timings)
+        over_budget = median > budget
+        leaked = bool(heavy_modules)
+        failed |= over_budget or leaked
+        print(
+            f"{'FAIL' if over_budget or leaked else 'ok  '} {statement}\n"
+            f"     median {median:.3f}s (min {min(timings):.3f}s, budget {budget:.3f}s)\n"
+            f"     heavy modules loaded: {', '.join(heavy_modules) or 'none'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
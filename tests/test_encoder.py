@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from knowledge_storm import encoder as encoder_module
+from knowledge_storm.encoder import EmbeddingCache, Encoder
+
+
+class FakeResponse(dict):
+    def __init__(self, data, total_tokens):
+        super().__init__(usage={"total_tokens": total_tokens})
+        self.data = data
+
+
+class InputError(Exception):
+    status_code = 400
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeLitellm:
+    """Embeds a text as [len(text), 1]; fails batches containing a text that starts with `bad`."""
+
+    def __init__(self, error=InputError, dim=2):
+        self.error = error
+        self.dim = dim
+        self.batch_sizes = []
+
+    def embedding(self, model, input, **kwargs):
+        self.batch_sizes.append(len(input))
+        if any(text.startswith("bad") for text in input):
+            raise self.error("rejected")
+        data = [
+            {"index": i, "embedding": [float(len(text))] + [1.0] * (self.dim - 1)}
+            for i, text in enumerate(input)
+        ]
+        return FakeResponse(data, total_tokens=len(input))
+
+
+@pytest.fixture
+def fake_litellm(monkeypatch):
+    fake = FakeLitellm()
+    monkeypatch.setattr(encoder_module, "litellm", fake)
+    return fake
+
+
+def make_encoder(**kwargs):
+    return Encoder(
+        encoder_type="openai",
+        api_key="test-key",
+        embedding_cache=EmbeddingCache(persistent=False),
+        **kwargs,
+    )
+
+
+def test_only_rejected_texts_are_masked(fake_litellm):
+    texts = ["aaa", "bad1", "ccc", "dd", "e", "bad2", "ff"]
+    embeddings, failed = make_encoder().encode(texts, return_failed_mask=True)
+    assert failed.tolist() == [False, True, False, False, False, True, False]
+    assert embeddings[2].tolist() == [3.0, 1.0]
+    assert not embeddings[1].any()
+
+
+def test_transient_errors_fail_the_batch_without_bisecting(monkeypatch):
+    fake = FakeLitellm(error=RateLimitError)
+    monkeypatch.setattr(encoder_module, "litellm", fake)
+    embeddings, failed = make_encoder().encode(
+        ["aaa", "bad", "ccc", "dd"], return_failed_mask=True
+    )
+    assert failed.all()
+    assert fake.batch_sizes == [4]
+
+
+def test_all_failed_keeps_the_embedding_dimension(fake_litellm):
+    embeddings, failed = make_encoder().encode(
+        ["bad1", "bad2"], return_failed_mask=True
+    )
+    assert failed.all()
+    assert embeddings.shape == (2, encoder_module.DEFAULT_EMBEDDING_DIM)
+
+
+def test_embeddings_of_another_size_than_the_cached_ones_are_masked(monkeypatch):
+    cache = EmbeddingCache(persistent=False)
+    monkeypatch.setattr(encoder_module, "litellm", FakeLitellm(dim=2))
+    Encoder(encoder_type="openai", api_key="test-key", embedding_cache=cache).encode(
+        ["aaa"]
+    )
+
+    monkeypatch.setattr(encoder_module, "litellm", FakeLitellm(dim=3))
+    embeddings, failed = Encoder(
+        encoder_type="openai", api_key="test-key", embedding_cache=cache
+    ).encode(["aaa", "bbbb"], return_failed_mask=True)
+    assert failed.tolist() == [False, True]
+    assert embeddings[0].tolist() == [3.0, 1.0]
@@ -0,0 +1,103 @@
+import inspect
+
+import dspy
+import pytest
+
+from knowledge_storm.collaborative_storm.modules.information_insertion_module import (
+    InsertInformationModule,
+)
+from knowledge_storm.dataclass import KnowledgeNode
+
+
+@pytest.fixture
+def module():
+    return InsertInformationModule(engine=None, encoder=None)
+
+
+def make_tree(*child_names):
+    root = KnowledgeNode(name="root")
+    for name in child_names:
+        root.children.append(KnowledgeNode(name=name, parent=root))
+    return root
+
+
+def placements(*paths):
+    return {
+        (f"question {i}", f"query {i}"): dspy.Prediction(
+            information_placement=path, note=""
+        )
+        for i, path in enumerate(paths)
+    }
+
+
+def reconciled(module, root, intent_to_placement_dict):
+    module._reconcile_new_node_placements(
+        knowledge_base=None,
+        intent_to_placement_dict=intent_to_placement_dict,
+        root=root,
+    )
+    return [
+        prediction.information_placement
+        for prediction in intent_to_placement_dict.values()
+    ]
+
+
+def test_new_nodes_merge_into_existing_near_duplicates(module):
+    root = make_tree("Economic Impact", "History")
+    assert reconciled(
+        module,
+        root,
+        placements(
+            "root -> Economic Impacts", "root -> economic-impact", "root -> HISTORY"
+        ),
+    ) == ["root -> Economic Impact", "root -> Economic Impact", "root -> History"]
+
+
+def test_concurrent_new_nodes_are_created_once(module):
+    root = make_tree("History")
+    assert reconciled(
+        module,
+        root,
+        placements(
+            "root -> Energy Policies",
+            "root -> energy policy",
+            "root -> Energy Policies -> Subsidies",
+            "root -> Energy Policy -> Subsidy",
+        ),
+    ) == [
+        "root -> Energy Policies",
+        "root -> Energy Policies",
+        "root -> Energy Policies -> Subsidies",
+        "root -> Energy Policies -> Subsidies",
+    ]
+
+
+@pytest.mark.parametrize(
+    "existing, proposed",
+    [
+        ("World War I", "World War II"),
+        ("Q1 2023 Results", "Q2 2023 Results"),
+        ("Bus", "Bu"),
+        ("Economic Impact", "Environmental Impact"),
+    ],
+)
+def test_distinct_names_are_not_merged(module, existing, proposed):
+    root = make_tree(existing)
+    assert reconciled(module, root, placements(f"root -> {proposed}")) == [
+        f"root -> {proposed}"
+    ]
+
+
+def test_missing_placements_are_skipped(module):
+    intent_to_placement_dict = {("question", "query"): None}
+    module._reconcile_new_node_placements(
+        knowledge_base=None,
+        intent_to_placement_dict=intent_to_placement_dict,
+        root=make_tree(),
+    )
+    assert intent_to_placement_dict == {("question", "query"): None}
+
+
+def test_placements_are_sequential_by_default():
+    parameters = inspect.signature(InsertInformationModule.forward).parameters
+    assert parameters["concurrent_placement"].default is False
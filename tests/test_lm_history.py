@@ -0,0 +1,53 @@
+from knowledge_storm.interface import LMConfigs, LMHistory
+
+
+class FakeLM:
+    def __init__(self):
+        self.history = []
+
+
+class FakeLMConfigs(LMConfigs):
+    def __init__(self):
+        self.first_lm = None
+        self.second_lm = None
+
+    def set_first_lm(self, model):
+        self.first_lm = model
+
+    def set_second_lm(self, model):
+        self.second_lm = model
+
+
+def test_policy_applies_to_lms_set_before_and_after():
+    configs = FakeLMConfigs()
+    configs.set_first_lm(FakeLM())
+    configs.set_lm_history_policy(max_entries=2)
+    configs.set_second_lm(FakeLM())
+
+    for lm in (configs.first_lm, configs.second_lm):
+        assert isinstance(lm.history, LMHistory)
+        lm.history.extend([{"i": i} for i in range(5)])
+        assert list(lm.history) == [{"i": 3}, {"i": 4}]
+        assert lm.history.num_dropped == 3
+
+
+def test_no_policy_leaves_history_untouched():
+    configs = FakeLMConfigs()
+    lm = FakeLM()
+    configs.set_first_lm(lm)
+    assert type(lm.history) is list
+
+
+def test_shared_lm_keeps_its_history_and_sink(tmp_path):
+    configs = FakeLMConfigs()
+    configs.set_lm_history_policy(sink_dir=str(tmp_path))
+    lm = FakeLM()
+    configs.set_first_lm(lm)
+    lm.history.append({"call": 1})
+    history = lm.history
+
+    configs.set_second_lm(lm)
+
+    assert lm.history is history
+    assert len(list(tmp_path.iterdir())) == 1
+    assert configs.collect_and_reset_lm_history() == [{"call": 1}]
@@ -0,0 +1,83 @@
+from knowledge_storm.cache import SQLiteCache
+from knowledge_storm.interface import Retriever
+from knowledge_storm.rm import SerperRM
+
+
+class FakeRM:
+    def __init__(self, k=3):
+        self.k = k
+        self.usage = 0
+        self.num_calls = 0
+
+    def search_cache_params(self):
+        return {"k": self.k}
+
+    def __call__(self, query_or_queries, exclude_urls):
+        self.num_calls += 1
+        self.usage += 1
+        # Set on first use, like `SerperRM.search_url`; must not change the cache key.
+        self.search_url = "https://example.com/search"
+        return [
+            {
+                "url": f"https://example.com/{query_or_queries[0]}",
+                "title": "title",
+                "description": "description",
+                "snippets": ["snippet"],
+            }
+        ]
+
+
+class FakeRMWithoutParams(FakeRM):
+    search_cache_params = None
+
+
+def make_retriever(tmp_path, rm):
+    cache = SQLiteCache(path=str(tmp_path / "search_cache.sqlite3"))
+    return Retriever(rm=rm, search_cache=cache)
+
+
+def test_repeated_searches_hit_the_cache(tmp_path):
+    rm = FakeRM()
+    retriever = make_retriever(tmp_path, rm)
+    for _ in range(3):
+        assert len(retriever.retrieve("solar power")) == 1
+    assert rm.num_calls == 1
+    usage = retriever.collect_and_reset_rm_usage()
+    assert usage["FakeRM_cache_hits"] == 2
+    assert usage["FakeRM_cache_misses"] == 1
+
+
+def test_key_ignores_query_case_and_whitespace(tmp_path):
+    retriever = make_retriever(tmp_path, FakeRM())
+    assert retriever._search_cache_key(
+        "Solar  Power", []
+    ) == retriever._search_cache_key("solar power", [])
+
+
+def test_key_depends_on_backend_params_and_excluded_urls(tmp_path):
+    rm = FakeRM()
+    retriever = make_retriever(tmp_path, rm)
+    key = retriever._search_cache_key("solar power", [])
+    assert key != retriever._search_cache_key("solar power", ["https://a.com"])
+    rm.k = 5
+    assert key != retriever._search_cache_key("solar power", [])
+
+
+def test_backends_without_cache_params_are_not_cached(tmp_path):
+    rm = FakeRMWithoutParams()
+    retriever = make_retriever(tmp_path, rm)
+    retriever.retrieve("solar power")
+    retriever.retrieve("solar power")
+    assert rm.num_calls == 2
+
+
+def test_serper_key_is_stable_across_searches(tmp_path):
+    rm = SerperRM(serper_search_api_key="test-key", k=3)
+    retriever = make_retriever(tmp_path, rm)
+    key = retriever._search_cache_key("solar power", [])
+    # State that SerperRM changes while searching.
+    rm.search_url = f"{rm.base_url}/search"
+    rm.usage += 1
+    rm.results = [{"organic": []}]
+    assert retriever._search_cache_key("solar power", []) == key
+    assert "test-key" not in key
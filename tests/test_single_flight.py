@@ -0,0 +1,45 @@
+import asyncio
+
+from knowledge_storm.lm import SingleFlight
+
+
+def test_cancelled_waiter_does_not_break_the_flight():
+    single_flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def main():
+        leader = asyncio.ensure_future(single_flight.acall("key", slow))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(single_flight.acall("key", slow))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        assert await leader == "result"
+        assert single_flight.get_stats()["in_flight"] == 0
+        assert await single_flight.acall("key", slow) == "result"
+
+    asyncio.run(main())
+
+
+def test_waiter_takes_over_from_cancelled_leader():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(None)
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def main():
+        leader = asyncio.ensure_future(single_flight.acall("key", slow))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(single_flight.acall("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await waiter == "result"
+        assert len(calls) == 2
+        assert single_flight.get_stats()["in_flight"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import pickle
+
+import pytest
+
+from knowledge_storm import cache as cache_module
+from knowledge_storm.cache import SQLiteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def entry_size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_round_trip_and_namespaces(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.put("lm", "key", {"answer": 42})
+    assert cache.get("lm", "key") == {"answer": 42}
+    assert cache.get("embedding", "key") is None
+    assert cache.get_many("lm", ["missing", "key"]) == [None, {"answer": 42}]
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.put("search", "query", ["result"])
+    clock.now += 59
+    assert cache.get("search", "query") == ["result"]
+    clock.now += 2
+    assert cache.get("search", "query") is None
+
+
+def test_expired_entries_are_deleted_on_write(tmp_path, clock):
+    cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.put("search", "old", "value")
+    clock.now += 120
+    cache.put("search", "new", "value")
+    assert cache.get_stats(namespace="search")["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    value = "x" * 1000
+    cache = SQLiteCache(
+        path=str(tmp_path / "cache.sqlite3"), max_bytes=int(entry_size(value) * 2.5)
+    )
+    cache.put("lm", "a", value)
+    clock.now += 120
+    cache.put("lm", "b", value)
+    clock.now += 120
+    # Reading "a" makes "b" the least recently used entry.
+    assert cache.get("lm", "a") == value
+    clock.now += 120
+    cache.put("lm", "c", value)
+
+    assert cache.get("lm", "b") is None
+    assert cache.get("lm", "a") == value
+    assert cache.get("lm", "c") == value
+    assert cache.get_stats()["bytes"] <= cache.max_bytes
+
+
+def test_values_larger_than_the_cache_are_not_stored(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"), max_bytes=100)
+    cache.put("lm", "big", "x" * 1000)
+    assert cache.get("lm", "big") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_stats_count_hits_and_misses(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.put("lm", "key", "value")
+    cache.get("lm", "key")
+    cache.get("lm", "other")
+    stats = cache.get_stats(namespace="lm", reset=True)
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert cache.get_stats(namespace="lm")["hits"] == 0